@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""Benchmark the reporter plugin with synthetic pytest sessions.
+
+Every scenario runs in a fresh interpreter because the plugin keeps its state in module globals.
+
+    $ python benchmarks/bench_reporter.py --tests 1000 10000 200000 --suites 200 --output bench.json
+    $ python benchmarks/bench_reporter.py --tests 10000 --compare bench.json
+    $ python benchmarks/bench_reporter.py --tests 10000 100000 --compact --check-size
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+METRICS = ('per_test_us', 'session_end_s', 'output_json_bytes', 'html_bytes', 'html_bytes_per_test',
+           'archive_bytes_per_build', 'peak_rss_kb')
+# HTML bytes per test of a synthetic session with --compact, see README.rst. Smaller sessions are dominated by
+# the fixed size of the template and are not checked.
+HTML_BYTES_PER_TEST_BUDGET = 150
+BUDGET_MIN_TESTS = 10000
+# bytes of the Archives tab per build it lists, the markup --compact shrinks the most; an indented report writes
+# about 5.5 KB per build of the synthetic suites, a compact one about 3 KB
+ARCHIVE_BYTES_PER_BUILD_BUDGET = 3500
+ARCHIVE_TAB_START = '<div class="tabcontent" id="archives">'
+ARCHIVE_TAB_END = '<div class="tabcontent" id="screenshots">'
+
+
+class FakeItem(object):
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+        self.name = nodeid.split('::')[-1]
+
+
+class FakeCall(object):
+    def __init__(self, when, start, duration):
+        self.when = when
+        self.start = start
+        self.stop = start + duration
+        self.duration = duration
+
+
+class FakeOutcome(object):
+    def __init__(self, result):
+        self.result = result
+
+    def get_result(self):
+        return self.result
+
+
+class FakeTerminalReporter(object):
+    def __init__(self, start):
+        self._sessionstarttime = start
+        self.lines = []
+
+    def write_line(self, line, **kwargs):
+        self.lines.append(line)
+
+
+def drive_wrapper(gen, result=None):
+    next(gen)
+    try:
+        gen.send(result)
+    except StopIteration:
+        pass
+
+
+def fake_build(start_time, suites, tests_per_suite, rng):
+    """An archived output.json with the same shape the plugin writes."""
+    data = {'content': {'suites': {}}, 'date': time.strftime('%B %d, %Y', time.localtime(start_time)),
+            'start_time': start_time, 'total_suite': suites, 'status': 'PASS'}
+    totals = dict.fromkeys(('pass', 'fail', 'skip', 'error', 'xpass', 'xfail', 'rerun'), 0)
+
+    for s in range(suites):
+        status = {'total_pass': 0, 'total_fail': 0, 'total_skip': 0, 'total_xpass': 0, 'total_xfail': 0,
+                  'total_error': 0, 'total_rerun': 0}
+        tests = {}
+        for t in range(tests_per_suite):
+            stat = 'FAIL' if rng.random() < 0.05 else 'PASS'
+            status['total_' + stat.lower()] += 1
+            totals[stat.lower()] += 1
+            tests[t] = {'status': stat, 'message': '', 'test_name': 'test_%d' % t, 'rerun': '0'}
+        data['content']['suites'][s] = {'suite_name': 'suite_%d.py' % s, 'status': status, 'tests': tests}
+        if status['total_fail']:
+            data['status'] = 'FAIL'
+
+    data['status_list'] = dict((k, str(v)) for k, v in totals.items())
+    data['total_tests'] = str(sum(v for k, v in totals.items() if k != 'rerun'))
+    return data
+
+
+def screenshot_png():
+    from PIL import Image
+
+    data = BytesIO()
+    Image.new('RGB', (1280, 720), (200, 30, 30)).save(data, 'PNG')
+    return data.getvalue()
+
+
+def run_scenario(args):
+    sys.argv = ['pytest'] + (['--reruns=1'] if args.rerun_ratio else [])
+
+    from pytest_html_reporter_netesenz import plugin
+    from pytest_html_reporter_netesenz.recovery import ReplayConfig, ReplayReport
+
+    options = plugin.option_defaults()
+    options['path'] = tempfile.mkdtemp(prefix='bench-report-')
+    options['compact'] = args.compact
+    config = ReplayConfig(options, ('rerunfailures',) if args.rerun_ratio else ())
+
+    rng = random.Random(args.seed)
+    base = options['path']
+    tests_per_suite = max(1, args.tests // args.suites)
+
+    if args.archives:
+        os.makedirs(base + '/archive')
+        for k in range(args.archives):
+            start = time.time() - (args.archives - k) * 3600
+            with open(base + '/archive/output_%s.json' % start, 'w') as f:
+                json.dump(fake_build(start, args.suites, tests_per_suite, rng), f)
+        shutil.copy(base + '/archive/output_%s.json' % start, base + '/output.json')
+
+    session_start = time.time()
+    reporter = plugin.HTMLReporter(options['path'], config)
+    png = screenshot_png() if args.screenshots else None
+    screenshots_left = args.screenshots
+
+    hook_start = time.perf_counter()
+    for i in range(args.tests):
+        nodeid = 'tests/suite_%d.py::test_%d' % (i // tests_per_suite, i)
+        item = FakeItem(nodeid)
+        roll = rng.random()
+        attempts = ['failed', 'passed'] if roll < args.rerun_ratio else [
+            'failed' if roll < args.rerun_ratio + args.fail_ratio else
+            'skipped' if roll < args.rerun_ratio + args.fail_ratio + args.skip_ratio else 'passed']
+
+        for outcome in attempts:
+            if outcome == 'failed' and screenshots_left:
+                plugin.screenshot(png)
+                screenshots_left -= 1
+
+            reporter.pytest_runtest_setup()
+            now = time.time()
+            phases = [('setup', 'skipped' if outcome == 'skipped' else 'passed')]
+            if outcome != 'skipped':
+                phases.append(('call', outcome))
+            phases.append(('teardown', 'passed'))
+
+            for when, phase_outcome in phases:
+                longrepr = ''
+                if phase_outcome == 'failed':
+                    longrepr = 'E   AssertionError: synthetic failure %d\nE   assert 1 == 2' % i
+                elif phase_outcome == 'skipped':
+                    longrepr = "('%s', 1, 'Skipped: synthetic')" % nodeid
+                duration = rng.random() / 100
+                drive_wrapper(reporter.pytest_runtest_makereport(item, FakeCall(when, now, duration)),
+                              FakeOutcome(ReplayReport(nodeid, when, phase_outcome, duration, longrepr)))
+                now += duration
+    hook_elapsed = time.perf_counter() - hook_start
+
+    end_start = time.perf_counter()
+    reporter.pytest_sessionfinish(None)
+    drive_wrapper(reporter.pytest_terminal_summary(FakeTerminalReporter(session_start), 0, config))
+    end_elapsed = time.perf_counter() - end_start
+
+    html_path = os.path.join(*reporter.report_path)
+    with open(html_path) as html_file:
+        html = html_file.read()
+    archive_tab = html[html.index(ARCHIVE_TAB_START):html.index(ARCHIVE_TAB_END)]
+    result = {
+        'tests': args.tests,
+        'suites': args.suites,
+        'fail_ratio': args.fail_ratio,
+        'skip_ratio': args.skip_ratio,
+        'rerun_ratio': args.rerun_ratio,
+        'archives': args.archives,
+        'screenshots': args.screenshots,
+        'per_test_us': round(hook_elapsed / max(1, args.tests) * 1e6, 2),
+        'session_end_s': round(end_elapsed, 4),
+        'output_json_bytes': os.path.getsize(base + '/output.json'),
+        'html_bytes': os.path.getsize(html_path),
+        'html_bytes_per_test': round(os.path.getsize(html_path) / float(max(1, args.tests)), 1),
+        'archive_bytes_per_build': round(len(archive_tab.encode('utf-8')) / float(args.archives + 1), 1),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    shutil.rmtree(base, ignore_errors=True)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, results):
+    rows = dict(((r['tests'], r['suites']), r) for r in previous['results'])
+    for result in results:
+        old = rows.get((result['tests'], result['suites']))
+        if old is None:
+            continue
+        print('%d tests / %d suites (vs %s)' % (result['tests'], result['suites'], previous.get('revision')))
+        for metric in METRICS:
+            # results written before a metric was added
+            if metric not in old: continue
+            ratio = result[metric] / old[metric] if old[metric] else float('nan')
+            print('  %-18s %14s -> %14s  x%.2f' % (metric, old[metric], result[metric], ratio))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tests', type=int, nargs='+', default=[1000, 10000], help='session sizes to run')
+    parser.add_argument('--suites', type=int, default=100, help='number of test suites (modules)')
+    parser.add_argument('--fail-ratio', type=float, default=0.05)
+    parser.add_argument('--skip-ratio', type=float, default=0.05)
+    parser.add_argument('--rerun-ratio', type=float, default=0.0, help='ratio of tests that fail once, then pass')
+    parser.add_argument('--archives', type=int, default=10, help='number of archived builds to load')
+    parser.add_argument('--screenshots', type=int, default=0, help='number of failures that attach a screenshot')
+    parser.add_argument('--compact', action='store_true', help='generate the report with --html-report-compact')
+    parser.add_argument('--check-size', action='store_true',
+                        help='fail when a session of %d tests or more exceeds %d HTML bytes per test, or any '
+                             'session %d bytes of archive markup per build'
+                             % (BUDGET_MIN_TESTS, HTML_BYTES_PER_TEST_BUDGET, ARCHIVE_BYTES_PER_BUILD_BUDGET))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench_results.json', help='where to write the results')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.child:
+        args.tests = args.tests[0]
+        print(json.dumps(run_scenario(args)))
+        return
+
+    results = []
+    for tests in args.tests:
+        cmd = [sys.executable, os.path.abspath(__file__), '--child', '--tests', str(tests),
+               '--suites', str(args.suites), '--fail-ratio', str(args.fail_ratio),
+               '--skip-ratio', str(args.skip_ratio), '--rerun-ratio', str(args.rerun_ratio),
+               '--archives', str(args.archives), '--screenshots', str(args.screenshots), '--seed', str(args.seed)]
+        if args.compact: cmd.append('--compact')
+        result = json.loads(subprocess.check_output(cmd).decode().strip().splitlines()[-1])
+        print('%(tests)d tests: %(per_test_us).1f us/test, session end %(session_end_s).3f s, '
+              'output.json %(output_json_bytes)d B, html %(html_bytes)d B (%(html_bytes_per_test).1f B/test, '
+              '%(archive_bytes_per_build).1f B/build in Archives), peak RSS %(peak_rss_kb)d KB' % result)
+        results.append(result)
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.check_size:
+        over = []
+        for result in results:
+            if result['tests'] >= BUDGET_MIN_TESTS and result['html_bytes_per_test'] > HTML_BYTES_PER_TEST_BUDGET:
+                over.append('%(tests)d tests: %(html_bytes_per_test).1f HTML bytes per test' % result +
+                            ' exceed the budget of %d' % HTML_BYTES_PER_TEST_BUDGET)
+            if result['archive_bytes_per_build'] > ARCHIVE_BYTES_PER_BUILD_BUDGET:
+                over.append('%(tests)d tests: %(archive_bytes_per_build).1f Archives bytes per build' % result +
+                            ' exceed the budget of %d' % ARCHIVE_BYTES_PER_BUILD_BUDGET)
+        for line in over:
+            print(line)
+        if over: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+import sys
+
+from pytest_html_reporter_netesenz import recovery, sharding
+
+COMMANDS = {
+    'recover': recovery.main,
+    'render': recovery.render_main,
+    'shard': sharding.main,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        sys.exit('usage: python -m pytest_html_reporter_netesenz {%s} ...' % ','.join(sorted(COMMANDS)))
+    COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == '__main__':
+    main()
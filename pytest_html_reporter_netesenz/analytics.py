@@ -0,0 +1,137 @@
+import bisect
+import heapq
+import math
+
+# durations below this are counted as zero, pytest reports sub-microsecond phases for trivial tests
+MIN_DURATION = 1e-6
+# upper bounds in seconds of the exported duration histograms, the Prometheus client defaults plus a long tail
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class DurationSketch(object):
+    """Streaming quantile sketch with a fixed relative error (log-spaced buckets, DDSketch style).
+
+    Memory depends on the spread of durations, not on the number of tests.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max: self.max = value
+
+        if value < MIN_DURATION:
+            self.zero_count += 1
+        else:
+            key = int(math.ceil(math.log(value) / self.log_gamma))
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q):
+        if self.count == 0: return 0.0
+
+        # nearest-rank definition: the smallest value with at least q * count values at or below it
+        rank = max(1, int(math.ceil(q * self.count)))
+        seen = self.zero_count
+        if rank <= seen: return 0.0
+
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return min(2 * self.gamma ** key / (self.gamma + 1), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': round(self.mean(), 6),
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'p99': round(self.quantile(0.99), 6),
+            'max': round(self.max, 6),
+        }
+
+
+class DurationHistogram(object):
+    """Fixed-bucket histogram, counts are per bucket (not cumulative) until exported."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        # the last slot counts durations above the largest bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs ending with ('+Inf', count)."""
+        pairs, seen = [], 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            seen += count
+            pairs.append((bound, seen))
+        return pairs
+
+
+class SlowestTests(object):
+    """Bounded min-heap keeping the ``size`` slowest tests seen so far."""
+
+    def __init__(self, size=20):
+        self.size = size
+        self.heap = []
+        self.seq = 0
+
+    def add(self, duration, entry):
+        if self.size <= 0: return
+        self.seq += 1
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, (duration, self.seq, entry))
+        elif duration > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (duration, self.seq, entry))
+
+    def items(self):
+        return [(duration, entry) for duration, _, entry in sorted(self.heap, key=lambda x: (-x[0], x[1]))]
+
+
+class DurationAnalytics(object):
+    """Per-suite and overall duration percentiles plus the slowest tests, fed one test at a time."""
+
+    def __init__(self, top_n=20):
+        self.overall = DurationSketch()
+        self.suites = {}
+        self.histograms = {}
+        self.suite_order = []
+        self.slowest = SlowestTests(top_n)
+
+    def add(self, suite, test, duration, status):
+        sketch = self.suites.get(suite)
+        if sketch is None:
+            sketch = self.suites[suite] = DurationSketch()
+            self.histograms[suite] = DurationHistogram()
+            self.suite_order.append(suite)
+
+        sketch.add(duration)
+        self.histograms[suite].add(duration)
+        self.overall.add(duration)
+        self.slowest.add(duration, (suite, test, status))
+
+    def summary(self):
+        return {
+            'overall': self.overall.summary(),
+            'suites': dict((suite, self.suites[suite].summary()) for suite in self.suite_order),
+            'slowest': [{'suite': suite, 'test_name': test, 'status': status, 'duration': round(duration, 6)}
+                        for duration, (suite, test, status) in self.slowest.items()],
+        }
@@ -0,0 +1,55 @@
+import json
+import math
+
+BASELINE_FILE = 'duration_baselines.json'
+# weight of the newest build in the moving average
+DEFAULT_ALPHA = 0.2
+# builds a test needs in its baseline before it can be flagged
+MIN_SAMPLES = 3
+# noise floor for the standard deviation, so perfectly stable tests are not flagged for microseconds of jitter
+MIN_STD = 0.005
+MIN_STD_FRACTION = 0.05
+
+
+class DurationBaselines(object):
+    """Exponentially weighted mean and variance of every test's duration across builds."""
+
+    def __init__(self, baselines=None, alpha=DEFAULT_ALPHA):
+        # nodeid -> [mean, variance, samples]
+        self.baselines = baselines or {}
+        self.alpha = alpha
+
+    @classmethod
+    def load(cls, path, alpha=DEFAULT_ALPHA):
+        try:
+            with open(path) as baseline_file:
+                return cls(json.load(baseline_file), alpha)
+        except (IOError, ValueError):
+            return cls(alpha=alpha)
+
+    def save(self, path):
+        with open(path, 'w') as baseline_file:
+            json.dump(self.baselines, baseline_file)
+
+    def update(self, nodeid, duration):
+        baseline = self.baselines.get(nodeid)
+        if baseline is None:
+            self.baselines[nodeid] = [duration, 0.0, 1]
+            return
+
+        mean, variance, samples = baseline
+        diff = duration - mean
+        increment = self.alpha * diff
+        self.baselines[nodeid] = [mean + increment, (1 - self.alpha) * (variance + diff * increment), samples + 1]
+
+    def check(self, nodeid, duration, sigmas):
+        """Return (mean, std, score) when ``duration`` is more than ``sigmas`` deviations over the baseline."""
+        baseline = self.baselines.get(nodeid)
+        if baseline is None or baseline[2] < MIN_SAMPLES: return None
+
+        mean, variance = baseline[0], baseline[1]
+        std = max(math.sqrt(variance), mean * MIN_STD_FRACTION, MIN_STD)
+        score = (duration - mean) / std
+        if score > sigmas:
+            return mean, std, score
+        return None
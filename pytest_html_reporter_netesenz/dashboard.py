@@ -0,0 +1,173 @@
+import collections
+import json
+import queue
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from pytest_html_reporter_netesenz.template import live_template
+
+DEFAULT_PORT = 8765
+# events a client may fall behind before it is dropped; the browser reconnects and starts from a snapshot
+CLIENT_QUEUE_SIZE = 1000
+LATEST_ROWS = 200
+KEEPALIVE = 15.0
+
+
+class Broadcaster(object):
+    """Fan out results to connected clients without ever blocking the test run.
+
+    Every client gets a bounded queue. ``publish`` only does non-blocking puts; a client whose queue is full is
+    disconnected instead of slowing the tests down.
+    """
+
+    def __init__(self, queue_size=CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.counts = {}
+        self.total = 0
+        self.failures = []
+        self.latest = collections.deque(maxlen=LATEST_ROWS)
+        self.finished = None
+
+    def subscribe(self):
+        """A new client queue, primed with a snapshot of everything so far."""
+        client = queue.Queue(self.queue_size)
+        with self.lock:
+            client.put_nowait(('snapshot', {
+                'status': self.status(), 'failures': list(self.failures), 'latest': list(self.latest)}))
+            if self.finished is not None:
+                client.put_nowait(('done', self.finished))
+            else:
+                self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def status(self):
+        done = self.finished is not None
+        return {'counts': dict(self.counts), 'total': self.total, 'done': done, 'updated': time.time(),
+                'report': self.finished['report'] if done else None,
+                'rendering': self.finished['rendering'] if done else False}
+
+    def publish(self, row):
+        with self.lock:
+            status = row[2]
+            self.counts[status] = self.counts.get(status, 0) + 1
+            self.total += 1
+            self.latest.append(row)
+            if status in ('FAIL', 'ERROR'): self.failures.append(row)
+            self._send('result', {'row': row, 'counts': dict(self.counts), 'total': self.total,
+                                  'updated': time.time()})
+
+    def finish(self, report, rendering=False):
+        with self.lock:
+            self.finished = {'done': True, 'report': report, 'rendering': rendering}
+            self._send('done', self.finished)
+            self.clients = set()
+
+    def _send(self, event, data):
+        # serialised by the client threads, the test thread only queues the dict
+        message = (event, data)
+        for client in list(self.clients):
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                self.clients.discard(client)
+                # the handler notices the sentinel once it drains the queue
+                _force_put(client, None)
+
+
+def _force_put(client, item):
+    try:
+        client.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        client.put_nowait(item)
+    except queue.Full:
+        pass
+
+
+class DashboardHandler(SimpleHTTPRequestHandler):
+    """``/`` is the live dashboard, ``/events`` the SSE stream, anything else a file of the report directory."""
+
+    broadcaster = None
+    page = b''
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path in ('/', '/live.html'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(self.page)))
+            self.end_headers()
+            self.wfile.write(self.page)
+        elif path == '/events':
+            self.stream_events()
+        else:
+            SimpleHTTPRequestHandler.do_GET(self)
+
+    def stream_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        client = self.broadcaster.subscribe()
+        try:
+            while True:
+                try:
+                    message = client.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+                    continue
+                if message is None: break
+
+                event, data = message
+                self.wfile.write(('event: %s\ndata: %s\n\n' % (event, json.dumps(data))).encode('utf-8'))
+                self.wfile.flush()
+                if event == 'done': break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.broadcaster.unsubscribe(client)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DashboardServer(object):
+    """Stdlib HTTP server on localhost pushing results to browsers over Server-Sent Events."""
+
+    def __init__(self, directory, title, port=DEFAULT_PORT, host='127.0.0.1'):
+        self.broadcaster = Broadcaster()
+        page = live_template().replace('__title__', title).replace('__live_transport__', 'sse').encode('utf-8')
+        handler = type('Handler', (DashboardHandler,), {'broadcaster': self.broadcaster, 'page': page})
+        self.server = ThreadingHTTPServer((host, port), partial(handler, directory=directory))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='html-report-dashboard')
+        self.thread.daemon = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://%s:%d/' % (host, port)
+
+    def start(self):
+        self.thread.start()
+
+    def publish(self, suite, test, status, duration, message):
+        self.broadcaster.publish([suite, test, status, round(duration, 3), message])
+
+    def finish(self, report, rendering=False):
+        self.broadcaster.finish(report, rendering)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
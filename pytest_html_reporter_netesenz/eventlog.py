@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+import time
+
+EVENT_LOG = 'events.ndjson'
+PREVIOUS_SUFFIX = '.1'
+# seconds between flushes of the buffered log to the OS; a killed process loses at most this much
+FLUSH_INTERVAL = 1.0
+
+
+class EventLog(object):
+    """Append-only NDJSON log of every test report, so a killed session can still be turned into a report.
+
+    Lines are buffered and a daemon thread flushes them every ``flush_interval`` seconds, so a test hanging until
+    the CI timeout does not hold back the results before it. Flushed data survives the process being killed;
+    nothing is fsynced, so it does not survive the machine going down.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # the previous session's log is kept next to it, it may be the one that still needs recovering
+        if os.path.exists(path): os.replace(path, path + PREVIOUS_SUFFIX)
+        # a new session starts a new log, from then on it is only appended to. Binary buffered files are
+        # thread safe, the flusher thread and the test thread can use it concurrently.
+        self.file = open(path, 'wb', buffering=1 << 16)
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,),
+                                         name='html-report-event-log')
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def _flush_periodically(self, interval):
+        while not self._closed.wait(interval):
+            self.file.flush()
+
+    def write(self, event):
+        self.file.write(json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n')
+
+    def session(self, start, options, rerun):
+        self.write({'event': 'session', 'start': start, 'pid': os.getpid(), 'options': options, 'rerun': rerun})
+        self.file.flush()
+
+    def report(self, rep, name, start, stop):
+        event = {'event': 'report', 'nodeid': rep.nodeid, 'name': name, 'when': rep.when, 'outcome': rep.outcome,
+                 'duration': rep.duration, 'start': start, 'stop': stop}
+        if not rep.passed: event['longrepr'] = rep.longreprtext
+        if hasattr(rep, 'wasxfail'): event['wasxfail'] = rep.wasxfail
+        self.write(event)
+
+    def screenshot(self, details, phash, visual_state):
+        event = dict(details, event='screenshot', hash=phash, visual_state=visual_state)
+        event['index'] = list(details['index'])
+        self.write(event)
+
+    def resources(self, samples):
+        self.write({'event': 'resources', 'samples': samples})
+
+    def live(self, directory, status):
+        """The live page left showing that the report is being written, for the renderer to finish."""
+        self.write({'event': 'live', 'directory': directory, 'status': status})
+
+    def close(self, reported=False):
+        """Flush and close the log; ``reported`` marks a session that went on to write its own report."""
+        if self._closed.is_set(): return
+        self._closed.set()
+        self._flusher.join()
+        self.write({'event': 'finish', 'stop': time.time(), 'reported': reported})
+        self.file.close()
+
+
+def read_events(path):
+    """Events of a log, stopping quietly at a line cut short by a crash."""
+    events = []
+    with open(path, 'rb') as log_file:
+        for line in log_file:
+            if not line.endswith(b'\n'): break
+            try:
+                events.append(json.loads(line.decode('utf-8')))
+            except ValueError:
+                break
+    return events
@@ -0,0 +1,100 @@
+import glob
+import json
+import os
+
+from pytest_html_reporter_netesenz.baselines import DurationBaselines, BASELINE_FILE
+
+# nodeid -> screenshot hash of the latest build, a small file read instead of the whole output.json
+SCREENSHOT_HASHES = 'screenshot_hashes.json'
+
+
+def load_builds(base):
+    """Every archived build plus the latest output.json under a report directory, oldest first."""
+    builds = []
+    for path in glob.glob(os.path.join(base, 'archive', '*.json')) + [os.path.join(base, 'output.json')]:
+        try:
+            with open(path) as build_file:
+                builds.append(json.load(build_file))
+        except (IOError, ValueError):
+            continue
+
+    builds.sort(key=lambda build: build.get('start_time') or 0)
+    return builds
+
+
+def iter_tests(build):
+    """(nodeid, test) pairs of a build; builds written before nodeids were stored fall back to suite::name."""
+    for suite in build.get('content', {}).get('suites', {}).values():
+        for test in suite.get('tests', {}).values():
+            nodeid = test.get('nodeid') or '%s::%s' % (suite.get('suite_name'), test.get('test_name'))
+            yield nodeid, test
+
+
+def screenshot_hashes(base):
+    """nodeid -> screenshot hash of the previous build, from the index it left under ``base``."""
+    try:
+        with open(os.path.join(base, SCREENSHOT_HASHES)) as index_file:
+            return json.load(index_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def write_screenshot_hashes(base, build):
+    """Replace the screenshot hash index with the hashes of ``build``, so the next build compares against it."""
+    hashes = dict((nodeid, test['screenshot_hash']) for nodeid, test in iter_tests(build)
+                  if test.get('screenshot_hash'))
+    path = os.path.join(base, SCREENSHOT_HASHES)
+    with open(path + '.tmp', 'w') as index_file:
+        json.dump(hashes, index_file)
+    os.replace(path + '.tmp', path)
+
+
+def historical_durations(base, builds=None):
+    """nodeid -> typical duration in seconds.
+
+    The moving averages of the duration baselines are preferred, archived builds fill in tests they do not cover.
+    """
+    durations = dict((nodeid, baseline[0]) for nodeid, baseline in
+                     DurationBaselines.load(os.path.join(base, BASELINE_FILE)).baselines.items())
+
+    totals = {}
+    for build in builds if builds is not None else load_builds(base):
+        for nodeid, test in iter_tests(build):
+            if nodeid in durations or 'duration' not in test: continue
+            total = totals.setdefault(nodeid, [0.0, 0])
+            total[0] += test['duration']
+            total[1] += 1
+
+    for nodeid, (total, count) in totals.items():
+        durations[nodeid] = total / count
+    return durations
+
+
+def failure_history(base, builds=None, recent=3):
+    """nodeid -> {'runs', 'failures', 'recent_failure', 'flaky'} over the archived builds.
+
+    ``recent_failure`` is set when the test failed in one of the last ``recent`` builds, ``flaky`` when it needed a
+    rerun to pass or flipped between passing and failing more than once.
+    """
+    builds = builds if builds is not None else load_builds(base)
+    stats = {}
+    for position, build in enumerate(builds):
+        is_recent = position >= len(builds) - recent
+        for nodeid, test in iter_tests(build):
+            status = test.get('status')
+            stat = stats.setdefault(nodeid, {'runs': 0, 'failures': 0, 'recent_failure': False, 'flaky': False,
+                                             'last': None, 'flips': 0})
+            stat['runs'] += 1
+            # skips and expected failures count as runs that did not fail, they never make a test flaky
+            if status not in ('PASS', 'FAIL', 'ERROR'): continue
+
+            failed = status != 'PASS'
+            stat['failures'] += failed
+            stat['recent_failure'] |= failed and is_recent
+            if stat['last'] is not None and stat['last'] != failed: stat['flips'] += 1
+            stat['flaky'] |= (not failed and str(test.get('rerun', '0')) != '0') or stat['flips'] >= 2
+            stat['last'] = failed
+
+    for stat in stats.values():
+        del stat['last'], stat['flips']
+    return stats
@@ -0,0 +1,76 @@
+import glob
+import json
+import os
+import time
+
+from pytest_html_reporter_netesenz.template import live_template
+
+LIVE_DIR = 'live'
+DEFAULT_INTERVAL = 5.0
+DEFAULT_BATCH = 500
+
+
+def write_atomic(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as out:
+        out.write(text)
+    os.replace(tmp_path, path)
+
+
+class LiveReport(object):
+    """Partial results for long sessions, served by a static live.html that polls for them.
+
+    Only results finished since the last flush are written, as a new numbered chunk; status.js carries the counters
+    and the number of chunks. Flushes happen at most every ``interval`` seconds, or once ``batch`` results are
+    pending. The full report template is never rendered here.
+    """
+
+    def __init__(self, directory, title, interval=DEFAULT_INTERVAL, batch=DEFAULT_BATCH):
+        self.directory = directory
+        self.interval = interval
+        self.batch = batch
+        self.pending = []
+        self.chunks = 0
+        self.counts = {}
+        self.total = 0
+        self.last_flush = time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, 'chunk_*.js')):
+            os.remove(stale)
+        write_atomic(os.path.join(directory, 'live.html'), live_template().replace('__title__', title)
+                     .replace('__live_transport__', 'poll'))
+        self.write_status(False)
+
+    def add(self, suite, test, status, duration, message):
+        self.pending.append((suite, test, status, round(duration, 3), message))
+        self.counts[status] = self.counts.get(status, 0) + 1
+        self.total += 1
+
+        if len(self.pending) >= self.batch or time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self, done=False, report=None, rendering=False):
+        if self.pending:
+            self.chunks += 1
+            write_atomic(os.path.join(self.directory, 'chunk_%06d.js' % self.chunks),
+                         'liveChunk(%d, %s);\n' % (self.chunks, json.dumps(self.pending).replace('</', '<\\/')))
+            self.pending = []
+        self.write_status(done, report, rendering)
+        self.last_flush = time.monotonic()
+
+    def status(self, done=False, report=None, rendering=False):
+        return {'counts': self.counts, 'total': self.total, 'chunks': self.chunks, 'done': done,
+                'updated': time.time(), 'report': report, 'rendering': rendering}
+
+    def write_status(self, done, report=None, rendering=False):
+        write_status(self.directory, self.status(done, report, rendering))
+
+
+def write_status(directory, status):
+    write_atomic(os.path.join(directory, 'status.js'), 'liveStatus(%s);\n' % json.dumps(status))
+
+
+def finish_rendered(directory, status, report):
+    """Mark the live page of an --html-report-async session finished, once the renderer has written ``report``."""
+    write_status(directory, dict(status, done=True, updated=time.time(), report=report, rendering=False))
@@ -0,0 +1,103 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_FILE = '.report.lock'
+# taken while the lock file is removed, so that removal never races a new owner
+GUARD_FILE = '.report.lock.guard'
+# a renderer holding the lock longer than this is assumed to be stuck
+LOCK_TIMEOUT = 600.0
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _is_current(fd, path):
+    """Whether ``fd`` is still the file at ``path``, i.e. it was not removed after it was opened."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    fst = os.fstat(fd)
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+
+@contextmanager
+def _guard(base, poll=0.01):
+    fd = os.open(os.path.join(base, GUARD_FILE), os.O_CREAT | os.O_RDWR)
+    try:
+        # only ever held for a stat and a remove
+        while not _try_lock(fd):
+            time.sleep(poll)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove_stale(base, path, timeout):
+    with _guard(base):
+        try:
+            if time.time() - os.path.getmtime(path) > timeout:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def report_lock(base, timeout=LOCK_TIMEOUT, poll=0.2):
+    """Serialise report generation in ``base`` across processes.
+
+    The lock is an OS file lock (``flock``, or ``msvcrt.locking`` on Windows) on a file holding the owner's pid, so
+    it is released by the kernel when its owner dies. A lock file last written more than ``timeout`` seconds ago
+    belongs to a stuck owner and is removed, letting the waiters lock a fresh one.
+    """
+    path = os.path.join(base, LOCK_FILE)
+    os.makedirs(base, exist_ok=True)
+    while True:
+        fd = os.open(path, os.O_CREAT | os.O_RDWR)
+        if _try_lock(fd):
+            if _is_current(fd, path):
+                break
+            _unlock(fd)
+        os.close(fd)
+        _remove_stale(base, path, timeout)
+        time.sleep(poll)
+    try:
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        yield path
+    finally:
+        try:
+            with _guard(base):
+                if _is_current(fd, path):
+                    os.remove(path)
+        except OSError:
+            pass
+        _unlock(fd)
+        os.close(fd)
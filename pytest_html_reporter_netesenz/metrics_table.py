@@ -0,0 +1,80 @@
+import re
+
+# letters and digits of any script; underscores and punctuation split words, as \p{L}\p{N} does in the report
+TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Lower-cased runs of letters and digits, the same words the report's search box splits a query into."""
+    return TOKEN.findall(text.lower())
+
+
+class MetricsTable(object):
+    """Column-oriented rows of the test metrics table, embedded as JSON and rendered by DataTables in the browser.
+
+    Suites, test names, statuses and messages are interned into one string table and stored as indices, so a suite
+    name or a repeated error message is written once however many rows share it. Rows are added to an inverted
+    index of the tokens of those strings as they come in, the search box looks queries up there instead of
+    scanning every row.
+
+    A row matches a query when every word of the query occurs inside one of the row's tokens: 'error' finds
+    'AssertionError' and 'login' finds 'test_login_ok', but a word never spans the underscore or punctuation between
+    two tokens. Matching is case-insensitive and covers suite, test name, status and the full message, not the
+    numeric columns.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self.string_index = {}
+        self.string_tokens = []
+        self.columns = dict((name, []) for name in
+                            ('suite', 'name', 'status', 'duration', 'setup', 'call', 'teardown', 'message'))
+        self.resources = []
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.columns['suite'])
+
+    def intern(self, value):
+        index = self.string_index.get(value)
+        if index is None:
+            index = self.string_index[value] = len(self.strings)
+            self.strings.append(value)
+            self.string_tokens.append(set(tokenize(value)))
+        return index
+
+    def add(self, suite, name, status, duration, setup, call, teardown, message, resources=()):
+        """Append a row; ``resources`` holds the optional per-test resource columns, already rounded."""
+        row = len(self)
+        columns = self.columns
+        strings = [self.intern(suite), self.intern(name), self.intern(status), self.intern(message)]
+        columns['suite'].append(strings[0])
+        columns['name'].append(strings[1])
+        columns['status'].append(strings[2])
+        columns['duration'].append(round(duration, 2))
+        columns['setup'].append(round(setup, 3))
+        columns['call'].append(round(call, 3))
+        columns['teardown'].append(round(teardown, 3))
+        columns['message'].append(strings[3])
+
+        if resources and not self.resources: self.resources = [[] for _ in resources]
+        for column, value in zip(self.resources, resources):
+            column.append(value)
+
+        for token in set().union(*(self.string_tokens[string] for string in strings)):
+            self.postings.setdefault(token, []).append(row)
+
+    def encode(self):
+        return dict(self.columns, strings=self.strings, resources=self.resources, index=self.encode_index())
+
+    def encode_index(self):
+        """Sorted tokens and their row postings, delta-encoded so that long postings stay small integers."""
+        tokens = sorted(self.postings)
+        postings = []
+        for token in tokens:
+            previous, deltas = 0, []
+            for row in self.postings[token]:
+                deltas.append(row - previous)
+                previous = row
+            postings.append(deltas)
+        return {'tokens': tokens, 'postings': postings}
@@ -0,0 +1,74 @@
+import os
+
+STATUSES = ('pass', 'fail', 'skip', 'error', 'xpass', 'xfail')
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics(json_data, analytics, generation_seconds):
+    """OpenMetrics text exposition of a finished run, built from generate_json_data's aggregates."""
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, kind))
+
+    def sample(name, value, **labels):
+        if labels:
+            name += '{%s}' % ','.join('%s="%s"' % (key, _label(labels[key])) for key in sorted(labels))
+        lines.append('%s %s' % (name, _number(value)))
+
+    status_list = json_data.get('status_list', {})
+    suites = [suite for suite in json_data['content']['suites'].values() if 'suite_name' in suite]
+
+    family('pytest_tests', 'gauge', 'Tests of the last run by final status.')
+    for status in STATUSES:
+        sample('pytest_tests', int(status_list.get(status, 0)), status=status)
+
+    family('pytest_reruns', 'gauge', 'Reruns of failed tests in the last run.')
+    sample('pytest_reruns', int(status_list.get('rerun', 0)))
+
+    family('pytest_suites', 'gauge', 'Test suites (modules) in the last run.')
+    sample('pytest_suites', len(suites))
+
+    family('pytest_suite_tests', 'gauge', 'Tests of the last run by suite and final status.')
+    for suite in suites:
+        for status in STATUSES:
+            sample('pytest_suite_tests', suite['status'].get('total_' + status, 0), suite=suite['suite_name'],
+                   status=status)
+
+    family('pytest_test_duration_seconds', 'histogram', 'Test durations (setup, call and teardown) by suite.')
+    for suite in analytics.suite_order:
+        histogram = analytics.histograms[suite]
+        for bound, count in histogram.cumulative():
+            sample('pytest_test_duration_seconds_bucket', count, suite=suite, le=bound)
+        sample('pytest_test_duration_seconds_count', histogram.count, suite=suite)
+        sample('pytest_test_duration_seconds_sum', round(histogram.total, 6), suite=suite)
+
+    family('pytest_run_status', 'gauge', '1 when the last run had no failures or errors.')
+    sample('pytest_run_status', int(json_data.get('status') == 'PASS'))
+
+    family('pytest_run_start_timestamp_seconds', 'gauge', 'Unix time the last run started.')
+    sample('pytest_run_start_timestamp_seconds', float(json_data.get('start_time') or 0))
+
+    family('pytest_report_generation_seconds', 'gauge', 'Time the reporter spent generating the report.')
+    sample('pytest_report_generation_seconds', round(generation_seconds, 6))
+
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path, text):
+    """Write atomically so a textfile collector never reads a half written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as metrics_file:
+        metrics_file.write(text)
+    os.replace(tmp_path, path)
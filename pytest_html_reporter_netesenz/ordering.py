@@ -0,0 +1,84 @@
+from pytest_html_reporter_netesenz.sharding import default_duration
+
+# durations below this do not make a test look infinitely cheap
+MIN_DURATION = 0.01
+
+
+def failure_rank(stats, durations):
+    """Sort key for a nodeid: recently failing or flaky tests first, then failure probability per second."""
+    fallback = default_duration(durations)
+
+    def rank(nodeid):
+        stat = stats.get(nodeid)
+        if stat is None:
+            # unseen tests are new or renamed, they are as likely to fail as anything in the history
+            probability = 0.5
+            group = 1
+        else:
+            probability = (stat['failures'] + 1.0) / (stat['runs'] + 2.0)
+            group = 0 if stat['recent_failure'] or stat['flaky'] else 1
+        return group, -probability / max(durations.get(nodeid, fallback), MIN_DURATION)
+
+    return rank
+
+
+def _parent(nodeid):
+    return nodeid.split('[', 1)[0].rsplit('::', 1)[0]
+
+
+def _path(nodeid):
+    """Directories, module and class of a test, outermost first."""
+    module = nodeid.split('::', 1)[0]
+    parent = _parent(nodeid)
+    return tuple(module.split('/')) + ((parent,) if parent != module else ())
+
+
+def higher_scoped_params(item):
+    """Parameter indices of the class, module, package or session scoped fixtures an item uses.
+
+    pytest groups items by these so every parametrized fixture is set up once per parameter; items with different
+    keys must keep their relative order.
+    """
+    callspec = getattr(item, 'callspec', None)
+    if callspec is None: return ()
+    fixturedefs = getattr(getattr(item, '_fixtureinfo', None), 'name2fixturedefs', {})
+
+    params = []
+    for name, index in sorted(callspec.indices.items()):
+        definitions = fixturedefs.get(name)
+        if definitions and definitions[-1].scope != 'function': params.append((name, index))
+    return tuple(params)
+
+
+def _order(entries, depth=0):
+    """Sort (path, rank, position, item) entries as a tree: every block moves as a whole, ranked by its best test."""
+    blocks = {}
+    for entry in entries:
+        path = entry[0]
+        key = path[depth] if depth < len(path) else entry[2]
+        blocks.setdefault((depth < len(path), key), []).append(entry)
+
+    ordered = []
+    for (nested, _), block in blocks.items():
+        block = _order(block, depth + 1) if nested else block
+        ordered.append((min(entry[1:3] for entry in block), block))
+    ordered.sort(key=lambda block: block[0])
+    return [entry for _, block in ordered for entry in block]
+
+
+def reorder(items, rank, nodeid=lambda item: item.nodeid, params=higher_scoped_params):
+    """Order ``items`` by ``rank`` without breaking up packages, modules, classes or fixture parameters.
+
+    Tests move only within their class (or module), classes within their module, modules within their package and
+    packages as a whole, so fixtures up to package scope are still set up once. Every block is ranked by its best
+    test. Consecutive items that share the same higher scoped fixture parameters (see higher_scoped_params) are
+    reordered independently, in the order pytest grouped them, so parametrized fixtures are not set up again.
+    """
+    runs = []
+    for position, item in enumerate(items):
+        key = nodeid(item)
+        run_key = params(item)
+        if not runs or runs[-1][0] != run_key: runs.append((run_key, []))
+        runs[-1][1].append((_path(key), rank(key), position, item))
+
+    return [entry[3] for _, run in runs for entry in _order(run)]
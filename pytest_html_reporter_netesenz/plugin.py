@@ -2,15 +2,37 @@ import pytest
 import os, time
 import sys
 from datetime import date, datetime
-from pytest_html_reporter_netesenz.template import html_template
+from pytest_html_reporter_netesenz.template import html_template, compact_markup
 from pytest_html_reporter_netesenz.time_converter import time_converter
+from pytest_html_reporter_netesenz.profiler import PhaseProfiler, null_stage
+from pytest_html_reporter_netesenz.analytics import DurationAnalytics
+from pytest_html_reporter_netesenz.baselines import DurationBaselines, BASELINE_FILE
+from pytest_html_reporter_netesenz.metrics_table import MetricsTable
+from pytest_html_reporter_netesenz.timeline import encode_timeline, script_json
+from pytest_html_reporter_netesenz.resources import ResourceMeter
+from pytest_html_reporter_netesenz.sampler import ResourceSampler, DEFAULT_INTERVAL
+from pytest_html_reporter_netesenz.history import historical_durations, failure_history, load_builds, \
+    screenshot_hashes, write_screenshot_hashes, SCREENSHOT_HASHES
+from pytest_html_reporter_netesenz.ordering import failure_rank, reorder
+from pytest_html_reporter_netesenz.openmetrics import render_metrics, write_metrics
+from pytest_html_reporter_netesenz.eventlog import EventLog, EVENT_LOG
+from pytest_html_reporter_netesenz.locking import report_lock
+import subprocess
+import argparse
+from pytest_html_reporter_netesenz import live
+from pytest_html_reporter_netesenz.dashboard import DashboardServer, DEFAULT_PORT
+from pytest_html_reporter_netesenz.sharding import SHARD_FILE, load_shard_file, parse_shard, select_shard
 from os.path import isfile, join
 import json
 import glob
 from collections import Counter
-from PIL import Image
-from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import shutil
+import pathlib
+import threading
+from pytest_html_reporter_netesenz.screenshot_encoder import encode_screenshot, hash_distance, screenshot_extension, \
+    HASH_DIFF_THRESHOLD
 
 _total = _executed = 0
 _pass = _fail = 0
@@ -29,6 +51,7 @@ _asxfail = 0
 _asrerun = 0
 _current_error = ""
 _suite_name = _test_name = None
+_test_nodeid = None
 _scenario = []
 _test_suite_name = []
 _test_pass_list = []
@@ -40,7 +63,10 @@ _test_error_list = []
 _test_status = None
 _start_execution_time = 0
 _execution_time = _duration = 0
-_test_metrics_content = _suite_metrics_content = ""
+_setup_duration = _call_duration = _teardown_duration = 0
+_resource_usage = None
+_suite_metrics_content = ""
+_test_metrics = MetricsTable()
 _previous_suite_name = "None"
 _initial_trigger = True
 _spass_tests = 0
@@ -78,11 +104,33 @@ _suite_error = 0
 _suite_fail = 0
 _pvalue = 0
 screen_base = ''
-screen_img = None
+screen_data = None
 _attach_screenshot_details = ''
 _title = 'PYTEST REPORT'
 _env = 'Test'
 
+
+def screenshot_quality(value):
+    quality = int(value)
+    if not 1 <= quality <= 100:
+        raise argparse.ArgumentTypeError('screenshot quality must be between 1 and 100, got %s' % value)
+    return quality
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('expected a number of 1 or more, got %s' % value)
+    return number
+
+
+def positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError('expected a number greater than 0, got %s' % value)
+    return number
+
+
 def pytest_addoption(parser):
     group = parser.getgroup("report generator")
     
@@ -102,6 +150,220 @@ def pytest_addoption(parser):
         help="customize report title",
     )
 
+    group.addoption(
+        "--html-report-screenshot-format",
+        action="store",
+        dest="screenshot_format",
+        default="png",
+        choices=["png", "jpeg", "webp"],
+        help="image format used to store failure screenshots",
+    )
+
+    group.addoption(
+        "--html-report-screenshot-quality",
+        action="store",
+        dest="screenshot_quality",
+        type=screenshot_quality,
+        default=80,
+        help="jpeg/webp screenshot quality (1-100)",
+    )
+
+    group.addoption(
+        "--html-report-screenshot-max-width",
+        action="store",
+        dest="screenshot_max_width",
+        type=int,
+        default=0,
+        help="downscale screenshots wider than this many pixels (0 keeps full resolution)",
+    )
+
+    group.addoption(
+        "--html-report-screenshot-grayscale",
+        action="store_true",
+        dest="screenshot_grayscale",
+        default=False,
+        help="store failure screenshots in grayscale",
+    )
+
+    group.addoption(
+        "--html-report-slowest",
+        action="store",
+        dest="slowest",
+        type=positive_int,
+        default=20,
+        help="number of slowest tests listed in the Performance tab",
+    )
+
+    group.addoption(
+        "--html-report-slowdown-sigma",
+        action="store",
+        dest="slowdown_sigma",
+        type=float,
+        default=3.0,
+        help="flag tests slower than their historical baseline by this many standard deviations",
+    )
+
+    group.addoption(
+        "--html-report-resources",
+        action="store_true",
+        dest="resources",
+        default=False,
+        help="record CPU time and RSS growth of every test",
+    )
+
+    group.addoption(
+        "--html-report-tracemalloc",
+        action="store_true",
+        dest="tracemalloc",
+        default=False,
+        help="with --html-report-resources, also record each test's tracemalloc peak (slow)",
+    )
+
+    group.addoption(
+        "--html-report-sampler",
+        action="store_true",
+        dest="sampler",
+        default=False,
+        help="sample process CPU, RSS, threads and open files during the run and chart them under the timeline",
+    )
+
+    group.addoption(
+        "--html-report-sampler-interval",
+        action="store",
+        dest="sampler_interval",
+        type=positive_float,
+        default=DEFAULT_INTERVAL,
+        help="seconds between resource samples (default %s)" % DEFAULT_INTERVAL,
+    )
+
+    group.addoption(
+        "--html-report-shard",
+        action="store",
+        dest="shard",
+        default=None,
+        metavar="k/N",
+        help="run only shard k of N, balanced by historical test durations",
+    )
+
+    group.addoption(
+        "--html-report-shard-file",
+        action="store",
+        dest="shard_file",
+        default=None,
+        help="shard plan written by 'python -m pytest_html_reporter_netesenz shard' "
+             "(default <report>/%s), every shard of a run reads the same plan" % SHARD_FILE,
+    )
+
+    group.addoption(
+        "--html-report-history-order",
+        action="store_true",
+        dest="history_order",
+        default=False,
+        help="run recently failing and flaky tests first, then by failure probability per second of runtime",
+    )
+
+    group.addoption(
+        "--html-report-metrics",
+        action="store",
+        dest="metrics_path",
+        default=None,
+        help="also write run metrics to this OpenMetrics text file (e.g. for the node-exporter textfile collector)",
+    )
+
+    group.addoption(
+        "--html-report-event-log",
+        action="store_true",
+        dest="event_log",
+        default=False,
+        help="stream results to %s in the report directory, so 'python -m pytest_html_reporter_netesenz "
+             "recover' can rebuild the report of a killed session" % EVENT_LOG,
+    )
+
+    group.addoption(
+        "--html-report-live",
+        action="store_true",
+        dest="live",
+        default=False,
+        help="keep a live view of the results in <report>/%s/live.html while the tests run" % live.LIVE_DIR,
+    )
+
+    group.addoption(
+        "--html-report-live-interval",
+        action="store",
+        dest="live_interval",
+        type=float,
+        default=live.DEFAULT_INTERVAL,
+        help="seconds between live view updates (default %s)" % live.DEFAULT_INTERVAL,
+    )
+
+    group.addoption(
+        "--html-report-live-batch",
+        action="store",
+        dest="live_batch",
+        type=int,
+        default=live.DEFAULT_BATCH,
+        help="update the live view early once this many results are pending (default %s)" % live.DEFAULT_BATCH,
+    )
+
+    group.addoption(
+        "--html-report-serve",
+        action="store_true",
+        dest="serve",
+        default=False,
+        help="serve a live dashboard on localhost that receives results over Server-Sent Events",
+    )
+
+    group.addoption(
+        "--html-report-serve-port",
+        action="store",
+        dest="serve_port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="port of the live dashboard (default %s, 0 picks a free one)" % DEFAULT_PORT,
+    )
+
+    group.addoption(
+        "--html-report-async",
+        action="store_true",
+        dest="async_report",
+        default=False,
+        help="let pytest exit right after the tests and write the report from a detached process",
+    )
+
+    group.addoption(
+        "--html-report-compact",
+        action="store_true",
+        dest="compact",
+        default=False,
+        help="strip the indentation between tags of the generated table rows and archive panels",
+    )
+
+    group.addoption(
+        "--html-report-profile",
+        action="store_true",
+        dest="profile",
+        default=False,
+        help="profile the reporter's own report generation and print the timings",
+    )
+
+
+class _OptionRecorder(object):
+    def __init__(self):
+        self.defaults = {}
+
+    def getgroup(self, name):
+        return self
+
+    def addoption(self, *names, **kwargs):
+        self.defaults[kwargs['dest']] = kwargs.get('default')
+
+
+def option_defaults():
+    """dest -> default of every option this plugin registers."""
+    recorder = _OptionRecorder()
+    pytest_addoption(recorder)
+    return recorder.defaults
+
 
 def pytest_configure(config):
     path = config.getoption("path")
@@ -115,6 +377,22 @@ def pytest_configure(config):
 
     config._html = HTMLReporter(path, config)
     config.pluginmanager.register(config._html)
+    if config._html.resources is not None: config.pluginmanager.register(config._html.resources)
+
+    if config.getoption("serve"):
+        try:
+            config._html.dashboard = DashboardServer(config._html.report_path[0], _title,
+                                                     config.getoption("serve_port"))
+        except OSError as e:
+            raise pytest.UsageError('--html-report-serve: cannot listen on port %s: %s' % (
+                config.getoption("serve_port"), e))
+        config._html.dashboard.start()
+
+
+def pytest_unconfigure(config):
+    reporter = getattr(config, '_html', None)
+    if reporter is not None and reporter.dashboard is not None:
+        reporter.dashboard.stop()
 
 
 def suite_highlights(data):
@@ -178,16 +456,32 @@ def max_rerun():
 
 
 def screenshot(data=None):
-    global screen_base, screen_img
+    global screen_base, screen_data
 
     screen_base = HTMLReporter.base_path
-    screen_img = Image.open(BytesIO(data))
+    screen_data = data
 
 
 def clean_screenshots(path):
     screenshot_dir = os.path.abspath(os.path.expanduser(os.path.expandvars(path))) + '/pytest_screenshots'
+
+    # move the previous run's screenshots aside in O(1) and delete them off the main thread;
+    # leftovers from an interrupted cleanup are picked up by the next session
     if os.path.isdir(screenshot_dir):
-        shutil.rmtree(screenshot_dir)
+        trash_dir = screenshot_dir + '.trash-' + str(os.getpid()) + '-' + str(time.time()).replace('.', '')
+        try:
+            os.rename(screenshot_dir, trash_dir)
+        except OSError:
+            shutil.rmtree(screenshot_dir, ignore_errors=True)
+
+    trash_dirs = glob.glob(screenshot_dir + '.trash-*')
+    if trash_dirs:
+        threading.Thread(target=remove_screenshot_dirs, args=(trash_dirs,), daemon=True).start()
+
+
+def remove_screenshot_dirs(dirs):
+    for d in dirs:
+        shutil.rmtree(d, ignore_errors=True)
 
 
 def custom_title(title):
@@ -207,13 +501,72 @@ class HTMLReporter(object):
         self.config = config
         has_rerun = config.pluginmanager.hasplugin("rerunfailures")
         self.rerun = 0 if has_rerun else None
-
-    def pytest_runtest_teardown(self, item, nextitem):
-        global _test_name, _duration
-        _test_name = item.name
-
-        _test_end_time = time.time()
-        _duration = _test_end_time - _start_execution_time
+        self.screenshot_options = {
+            'fmt': config.getoption("screenshot_format"),
+            'quality': config.getoption("screenshot_quality"),
+            'max_width': config.getoption("screenshot_max_width"),
+            'grayscale': config.getoption("screenshot_grayscale"),
+        }
+        self.screenshot_pool = None
+        self.screenshot_jobs = []
+        self.profiler = PhaseProfiler() if config.getoption("profile") else None
+        self.phase_durations = {}
+        self.analytics = DurationAnalytics(config.getoption("slowest"))
+        self.slowdown_sigma = config.getoption("slowdown_sigma")
+        self.slowdowns = []
+        self.phase_times = {}
+        self.timeline = []
+        self.worker = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+        self.resources = ResourceMeter(config.getoption("tracemalloc")) if config.getoption("resources") else None
+        self.sampler = None
+        self.resource_samples = None
+        if config.getoption("sampler"):
+            self.sampler = ResourceSampler(config.getoption("sampler_interval"))
+            self.sampler.start()
+
+        self.shard = None
+        if config.getoption("shard"):
+            try:
+                self.shard = parse_shard(config.getoption("shard"))
+            except ValueError as e:
+                raise pytest.UsageError('--html-report-shard: %s' % e)
+        self.shard_file = config.getoption("shard_file")
+        self.history_order = config.getoption("history_order")
+        self.metrics_path = config.getoption("metrics_path")
+        self.compact = config.getoption("compact")
+
+        # resolves HTMLReporter.base_path, which attach() needs before the session ends
+        self.report_path
+
+        self.dashboard = None
+        self.live = None
+        if config.getoption("live"):
+            self.live = live.LiveReport(os.path.join(self.report_path[0], live.LIVE_DIR), _title,
+                                        config.getoption("live_interval"), config.getoption("live_batch"))
+
+        self.events = None
+        self.async_report = config.getoption("async_report")
+        # the detached renderer rebuilds the report from the event log
+        if config.getoption("event_log") or self.async_report:
+            self.events = EventLog(os.path.join(self.report_path[0], EVENT_LOG))
+            options = dict((dest, config.getoption(dest)) for dest in option_defaults())
+            self.events.session(time.time(), options, max_rerun() if self.rerun is not None else None)
+
+    def finish_test(self, name, nodeid):
+        global _test_name, _duration, _setup_duration, _call_duration, _teardown_duration, _resource_usage
+        _test_name = name
+        if self.resources is not None: _resource_usage = self.resources.stop(nodeid)
+
+        # monotonic per-phase durations measured by pytest itself, see process_report
+        phases = self.phase_durations.pop(nodeid, {})
+        _setup_duration = phases.get('setup', 0)
+        _call_duration = phases.get('call', 0)
+        _teardown_duration = phases.get('teardown', 0)
+        _duration = _setup_duration + _call_duration + _teardown_duration
+
+        times = self.phase_times.pop(nodeid, None)
+        if times is not None and times[0] is not None:
+            self.timeline.append((times[0], times[1], self.worker, _test_status, _suite_name, name))
 
         if (self.rerun is not None) and (max_rerun() is not None): self.previous_test_name(_test_name)
         self._test_names(_test_name)
@@ -229,12 +582,49 @@ class HTMLReporter(object):
             self.rerun = 0
             _previous_test_name = _test_name
 
+    def pytest_collection_modifyitems(self, session, config, items):
+        if self.shard is None and not self.history_order: return
+
+        base = self.report_path[0]
+
+        # shards started at different times would plan from a history the others keep changing, so every shard
+        # must read the same pinned plan; a single shard runs everything
+        if self.shard is not None and self.shard[1] > 1:
+            shard_file = self.shard_file or os.path.join(base, SHARD_FILE)
+            if not os.path.isfile(shard_file):
+                raise pytest.UsageError(
+                    '--html-report-shard: %s does not exist, write it once before starting the shards with '
+                    "'python -m pytest_html_reporter_netesenz shard --report %s --shards %d'" % (
+                        shard_file, base, self.shard[1]))
+            plan = load_shard_file(shard_file)
+            if plan['shards'] != self.shard[1]:
+                raise pytest.UsageError('--html-report-shard: %s plans %d shards, not %d' % (
+                    shard_file, plan['shards'], self.shard[1]))
+
+            selected = set(select_shard([item.nodeid for item in items], self.shard[0], self.shard[1],
+                                        plan['durations'], plan.get('assignment')))
+            deselected = [item for item in items if item.nodeid not in selected]
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+                items[:] = [item for item in items if item.nodeid in selected]
+
+        if self.history_order:
+            builds = load_builds(base)
+            items[:] = reorder(items, failure_rank(failure_history(base, builds), historical_durations(base, builds)))
+
     def pytest_runtest_setup(item):
         global _start_execution_time
         _start_execution_time = time.time()
 
     def pytest_sessionfinish(self, session):
         if _suite_name is not None: self.append_suite_metrics_row(_suite_name)
+        if self.live is not None: self.live.flush()
+
+        if self.sampler is not None:
+            self.sampler.stop()
+            # sample times share the timeline's origin so both charts line up
+            origin = min(entry[0] for entry in self.timeline) if self.timeline else None
+            self.resource_samples = self.sampler.summary(origin)
 
     def archive_data(self, base, filename):
         path = os.path.join(base, filename)
@@ -248,6 +638,29 @@ class HTMLReporter(object):
                 os.rename(base + '/' + f, os.path.join(base + '/archive', fname[0] + '_' +
                                                        str(_start_execution_time) + fname[1]))
 
+    def update_duration_baselines(self, base):
+        baselines = DurationBaselines.load(os.path.join(base, BASELINE_FILE))
+
+        for suite in self.json_data['content']['suites'].values():
+            for test in suite.get('tests', {}).values():
+                if test.get('status') != 'PASS' or 'nodeid' not in test: continue
+
+                slowdown = baselines.check(test['nodeid'], test['duration'], self.slowdown_sigma)
+                if slowdown is not None:
+                    self.slowdowns.append({
+                        'suite_name': suite.get('suite_name'),
+                        'test_name': test['test_name'],
+                        'nodeid': test['nodeid'],
+                        'duration': test['duration'],
+                        'baseline': round(slowdown[0], 6),
+                        'sigma': round(slowdown[2], 2),
+                    })
+                baselines.update(test['nodeid'], test['duration'])
+
+        baselines.save(os.path.join(base, BASELINE_FILE))
+        self.slowdowns.sort(key=lambda slowdown: slowdown['sigma'], reverse=True)
+        self.json_data['slowdowns'] = self.slowdowns
+
     @property
     def report_path(self):
         if '.html' in self.path:
@@ -265,8 +678,46 @@ class HTMLReporter(object):
     def pytest_terminal_summary(self, terminalreporter, exitstatus, config):
         yield
 
+        if self.async_report:
+            self.render_detached(terminalreporter)
+            return
+
+        try:
+            self.write_report(terminalreporter._sessionstarttime, terminalreporter)
+        except BaseException:
+            if self.events is not None: self.events.close()
+            raise
+        # only a log whose report was never written is left for recover
+        if self.events is not None: self.events.close(reported=True)
+
+    def render_detached(self, terminalreporter):
+        """Hand the event log to a detached ``render`` process and return without writing the report."""
+        # screenshots are encoded in this process's pool, their results go into the log for the renderer
+        self.finish_screenshots(terminalreporter)
+        if self.resource_samples is not None: self.events.resources(self.resource_samples)
+        # the report does not exist yet: the live page and the dashboard say it is being written, and the renderer
+        # marks the live page finished once it is
+        self.finish_live(rendering=True)
+        if self.live is not None: self.events.live(os.path.abspath(self.live.directory), self.live.status())
+        self.events.close()
+
+        base = self.report_path[0]
+        # a unique name, so the next session's log cannot truncate it before the renderer has read it
+        pending = os.path.join(base, 'pending_%s_%d.ndjson' % (str(time.time()).replace('.', ''), os.getpid()))
+        os.replace(self.events.path, pending)
+
+        detach = {'creationflags': 0x00000008} if os.name == 'nt' else {'start_new_session': True}
+        with open(os.path.join(base, 'render.log'), 'ab') as render_log:
+            renderer = subprocess.Popen([sys.executable, '-m', 'pytest_html_reporter_netesenz', 'render', pending],
+                                        stdin=subprocess.DEVNULL, stdout=render_log, stderr=subprocess.STDOUT,
+                                        close_fds=True, **detach)
+        terminalreporter.write_line('pytest-html-reporter: writing %s in the background (pid %d)' % (
+            os.path.join(*self.report_path), renderer.pid))
+
+    def write_report(self, session_start, terminalreporter=None, session_end=None):
+        """Run the report pipeline: archive the previous build, write output.json, the HTML report and extras."""
         global _execution_time
-        _execution_time = time.time() - terminalreporter._sessionstarttime
+        _execution_time = (session_end or time.time()) - session_start
 
         if _execution_time < 60:
             _execution_time = str(round(_execution_time, 2)) + " secs"
@@ -276,38 +727,108 @@ class HTMLReporter(object):
         global _total
         _total = _pass + _fail + _xpass + _xfail + _skip + _error
 
+        generation_start = time.perf_counter()
+        with self.stage('finish_screenshots'):
+            self.finish_screenshots(terminalreporter)
+
         if _suite_name is not None:
             base = self.report_path[0]
-            path = os.path.join(base, self.report_path[1])
+            with report_lock(base):
+                self.write_report_files(base, generation_start)
+
+        self.finish_live()
+
+        if self.profiler is not None and terminalreporter is not None:
+            for line in self.profiler.lines():
+                terminalreporter.write_line(line)
+
+    def finish_live(self, rendering=False):
+        """Tell the live page and the dashboard that the session is over and where its report is.
+
+        With ``rendering`` the report is still to be written by a detached renderer: the live page keeps polling
+        until the renderer marks it finished, the dashboard, which stops with pytest, shows where the report will be.
+        """
+        if self.live is not None:
+            if rendering:
+                self.live.flush(rendering=True)
+            else:
+                report = os.path.relpath(os.path.join(*self.report_path), self.live.directory) if _suite_name else None
+                self.live.flush(done=True, report=report)
+        if self.dashboard is not None:
+            self.dashboard.finish(pathlib.Path(os.path.join(*self.report_path)).as_uri() if _suite_name else None,
+                                  rendering)
+
+    def write_report_files(self, base, generation_start):
+        path = os.path.join(base, self.report_path[1])
 
-            os.makedirs(base, exist_ok=True)
+        with self.stage('archive_data'):
             self.archive_data(base, self.report_path[1])
 
-            # generate json file
+        # detect slowdowns and fold this build into the duration baselines
+        with self.stage('update_duration_baselines', os.path.join(base, BASELINE_FILE)):
+            self.update_duration_baselines(base)
+
+        # generate json file
+        with self.stage('generate_json_data', base + '/output.json'):
             self.generate_json_data(base)
 
-            # generate trends
+        with self.stage('write_screenshot_hashes', os.path.join(base, SCREENSHOT_HASHES)):
+            write_screenshot_hashes(base, self.json_data)
+
+        # generate trends
+        with self.stage('update_trends'):
             self.update_trends(base)
 
-            # generate archive template
+        # generate archive template
+        with self.stage('update_archives_template'):
             self.update_archives_template(base)
 
-            # generate suite highlights
+        # generate suite highlights
+        with self.stage('generate_suite_highlights'):
             generate_suite_highlights()
 
-            # generate html report
+        # generate html report
+        with self.stage('renew_template_text', path):
             live_logs_file = open(path, 'w')
             message = self.renew_template_text('https://i.imgur.com/LRSRHJO.png')
             live_logs_file.write(message)
             live_logs_file.close()
 
+        if self.metrics_path is not None:
+            with self.stage('write_metrics', self.metrics_path):
+                write_metrics(self.metrics_path, render_metrics(self.json_data, self.analytics,
+                                                                time.perf_counter() - generation_start))
+
+        if self.profiler is not None:
+            self.json_data['profile'] = self.profiler.summary()
+            with open(base + '/output.json', 'w') as outfile:
+                json.dump(self.json_data, outfile)
+
+    def pytest_report_header(self, config):
+        if self.dashboard is not None:
+            return 'live dashboard: %s' % self.dashboard.url
+
+    def stage(self, name, *paths):
+        if self.profiler is None: return null_stage
+        return self.profiler.stage(name, *paths)
+
     @pytest.hookimpl(tryfirst=True, hookwrapper=True)
     def pytest_runtest_makereport(self, item, call):
         outcome = yield
         rep = outcome.get_result()
 
-        global _suite_name
+        if self.events is not None: self.events.report(rep, item.name, call.start, call.stop)
+        if self.profiler is None:
+            self.process_report(rep, item.name, call.start, call.stop)
+        else:
+            hook_start = time.perf_counter_ns()
+            self.process_report(rep, item.name, call.start, call.stop)
+            self.profiler.add_hook_time(hook_start)
+
+    def process_report(self, rep, name, start=None, stop=None):
+        global _suite_name, _test_nodeid
         _suite_name = rep.nodeid.split("::")[0]
+        _test_nodeid = rep.nodeid
 
         if _initial_trigger:
             self.update_previous_suite_name()
@@ -375,40 +896,12 @@ class HTMLReporter(object):
                         longerr += line + "\n"
                     self.update_test_error(longerr)
 
-    def append_test_metrics_row(self):
-        global _test_metrics_content, _pvalue, _duration
+        self.phase_durations.setdefault(rep.nodeid, {})[rep.when] = rep.duration
+        self.phase_times.setdefault(rep.nodeid, [start, stop])[1] = stop
+        if rep.when == "teardown": self.finish_test(name, rep.nodeid)
 
-        test_row_text = """
-            <tr>
-                <td style="word-wrap: break-word;max-width: 200px; white-space: normal; text-align:left">__sname__</td>
-                <td style="word-wrap: break-word;max-width: 200px; white-space: normal; text-align:left">__name__</td>
-                <td>__stat__</td>
-                <td>__dur__</td>
-                <td style="word-wrap: break-word;max-width: 200px; white-space: normal; text-align:left"">
-                    __msg__
-                    __floating_error_text__
-                </td>
-            </tr>
-        """
-
-        floating_error_text = """
-            <a data-toggle="modal" href="#myModal-__runt__" class="">(...)</a>
-            <div class="modal fade in" id="myModal-__runt__" tabindex="-1" role="dialog" aria-labelledby="myModalLabel" aria-hidden="true">
-                <div class="modal-dialog">
-                    <div class="modal-content">
-                        <div class="modal-body">
-                            <p>
-                                <svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true" focusable="false" width="1.12em" height="1em" style="-ms-transform: rotate(360deg); -webkit-transform: rotate(360deg); transform: rotate(360deg);" preserveAspectRatio="xMidYMid meet" viewBox="0 0 1856 1664"><path d="M1056 1375v-190q0-14-9.5-23.5t-22.5-9.5H832q-13 0-22.5 9.5T800 1185v190q0 14 9.5 23.5t22.5 9.5h192q13 0 22.5-9.5t9.5-23.5zm-2-374l18-459q0-12-10-19q-13-11-24-11H818q-11 0-24 11q-10 7-10 21l17 457q0 10 10 16.5t24 6.5h185q14 0 23.5-6.5t10.5-16.5zm-14-934l768 1408q35 63-2 126q-17 29-46.5 46t-63.5 17H160q-34 0-63.5-17T50 1601q-37-63-2-126L816 67q17-31 47-49t65-18t65 18t47 49z" fill="#DC143C"/></svg>
-                                __full_msg__
-                            </p>
-                        </div>
-                        <div class="modal-footer">
-                            <button type="button" class="btn btn-primary" data-dismiss="modal">Close</button>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        """
+    def append_test_metrics_row(self):
+        global _pvalue
 
         if (self.rerun is not None) and (max_rerun() is not None):
             if (_test_status == 'FAIL') or (_test_status == 'ERROR'): _pvalue += 1
@@ -417,57 +910,17 @@ class HTMLReporter(object):
                 if ((_test_status == 'FAIL') or (_test_status == 'ERROR')) and (
                         screen_base != ''): self.generate_screenshot_data()
 
-                test_row_text = test_row_text.replace("__sname__", str(_suite_name))
-                test_row_text = test_row_text.replace("__name__", str(_test_name))
-                test_row_text = test_row_text.replace("__stat__", str(_test_status))
-                test_row_text = test_row_text.replace("__dur__", str(round(_duration, 2)))
-                test_row_text = test_row_text.replace("__msg__", str(_current_error[:50]))
-                floating_error_text = floating_error_text.replace("__runt__", str(time.time()).replace('.', ''))
-
-                if len(_current_error) < 49:
-                    test_row_text = test_row_text.replace("__floating_error_text__", str(''))
-                else:
-                    test_row_text = test_row_text.replace("__floating_error_text__", str(floating_error_text))
-                    test_row_text = test_row_text.replace("__full_msg__", str(_current_error))
-
-
-                _test_metrics_content += test_row_text
+                self.record_result()
                 _pvalue = 0
             elif (self.rerun is not None) and (
                     (_test_status == 'xFAIL') or (_test_status == 'xPASS') or (_test_status == 'SKIP')):
-                test_row_text = test_row_text.replace("__sname__", str(_suite_name))
-                test_row_text = test_row_text.replace("__name__", str(_test_name))
-                test_row_text = test_row_text.replace("__stat__", str(_test_status))
-                test_row_text = test_row_text.replace("__dur__", str(round(_duration, 2)))
-                test_row_text = test_row_text.replace("__msg__", str(_current_error[:50]))
-                floating_error_text = floating_error_text.replace("__runt__", str(time.time()).replace('.', ''))
-
-                if len(_current_error) < 49:
-                    test_row_text = test_row_text.replace("__floating_error_text__", str(''))
-                else:
-                    test_row_text = test_row_text.replace("__floating_error_text__", str(floating_error_text))
-                    test_row_text = test_row_text.replace("__full_msg__", str(_current_error))
-
-                _test_metrics_content += test_row_text
+                self.record_result()
 
         elif (self.rerun is None) or (max_rerun() is None):
             if ((_test_status == 'FAIL') or (_test_status == 'ERROR')) and (
                     screen_base != ''): self.generate_screenshot_data()
 
-            test_row_text = test_row_text.replace("__sname__", str(_suite_name))
-            test_row_text = test_row_text.replace("__name__", str(_test_name))
-            test_row_text = test_row_text.replace("__stat__", str(_test_status))
-            test_row_text = test_row_text.replace("__dur__", str(round(_duration, 2)))
-            test_row_text = test_row_text.replace("__msg__", str(_current_error[:50]))
-            floating_error_text = floating_error_text.replace("__runt__", str(time.time()).replace('.', ''))
-
-            if len(_current_error) < 49:
-                test_row_text = test_row_text.replace("__floating_error_text__", str(''))
-            else:
-                test_row_text = test_row_text.replace("__floating_error_text__", str(floating_error_text))
-                test_row_text = test_row_text.replace("__full_msg__", str(_current_error))
-
-            _test_metrics_content += test_row_text
+            self.record_result()
 
         self.json_data['content']['suites'].setdefault(len(_test_suite_name), {})['suite_name'] = str(_suite_name)
         self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
@@ -476,6 +929,21 @@ class HTMLReporter(object):
             len(_scenario) - 1, {})['message'] = str(_current_error)
         self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
             len(_scenario) - 1, {})['test_name'] = str(_test_name)
+        self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
+            len(_scenario) - 1, {})['nodeid'] = str(_test_nodeid)
+        self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
+            len(_scenario) - 1, {})['duration'] = round(_duration, 6)
+        self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
+            len(_scenario) - 1, {})['setup_duration'] = round(_setup_duration, 6)
+        self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
+            len(_scenario) - 1, {})['call_duration'] = round(_call_duration, 6)
+        self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests', {}).setdefault(
+            len(_scenario) - 1, {})['teardown_duration'] = round(_teardown_duration, 6)
+        if self.resources is not None:
+            cpu_time, rss_delta, memory_peak = _resource_usage or (0.0, 0, None)
+            self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault(
+                'tests', {}).setdefault(len(_scenario) - 1, {}).update(
+                {'cpu_time': round(cpu_time, 6), 'rss_delta': rss_delta, 'memory_peak': memory_peak})
 
         if (self.rerun is not None) and (max_rerun() is not None):
             self.json_data['content']['suites'].setdefault(len(_test_suite_name), {}).setdefault('tests',
@@ -486,26 +954,117 @@ class HTMLReporter(object):
                                                                                                  {}).setdefault(
                 len(_scenario) - 1, {})['rerun'] = '0'
 
+    def record_result(self):
+        """Add the final result of the current test to the metrics table and feed it to the streaming consumers."""
+        _test_metrics.add(_suite_name, _test_name, _test_status, _duration, _setup_duration, _call_duration,
+                          _teardown_duration, _current_error, self.resource_values())
+        self.analytics.add(_suite_name, _test_name, _duration, _test_status)
+        if self.live is not None: self.live.add(_suite_name, _test_name, _test_status, _duration, _current_error)
+        if self.dashboard is not None:
+            self.dashboard.publish(_suite_name, _test_name, _test_status, _duration, _current_error)
+
+    def resource_values(self):
+        if self.resources is None: return ()
+
+        cpu_time, rss_delta, memory_peak = _resource_usage or (0.0, 0, None)
+        values = [round(cpu_time, 3), round(rss_delta / 1048576.0, 2)]
+        if self.resources.trace_memory:
+            values.append(round(memory_peak / 1048576.0, 2) if memory_peak is not None else None)
+        return values
+
+    def resource_headers(self):
+        if self.resources is None: return ''
+
+        headers = '<th>CPU (s)</th><th>RSS delta (MB)</th>'
+        if self.resources.trace_memory: headers += '<th>Alloc peak (MB)</th>'
+        return headers
+
     def generate_screenshot_data(self):
         os.makedirs(screen_base + '/pytest_screenshots', exist_ok=True)
 
-        _screenshot_name = round(time.time())
+        _screenshot_name = str(round(time.time())) + '_' + str(len(self.screenshot_jobs)) + '.' + \
+            screenshot_extension(self.screenshot_options['fmt'])
         _screenshot_suite_name = _suite_name.split('/')[-1:][0].replace('.py', '')
         _screenshot_test_name = _test_name
         if len(_test_name) >= 19: _screenshot_test_name = _test_name[-17:]
         _screenshot_error = _current_error
 
-        screen_img.save(
-            screen_base + '/pytest_screenshots/' + str(_screenshot_name) + '.png'
+        # compression happens in worker processes so the GIL is not held while tests keep running
+        if self.screenshot_pool is None:
+            # never fork: the cleanup and sampler threads may hold locks that a forked child would inherit
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self.screenshot_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context(start_method))
+        job = self.screenshot_pool.submit(
+            encode_screenshot, screen_data, screen_base + '/pytest_screenshots/' + _screenshot_name,
+            **self.screenshot_options
         )
 
-        # attach screenshots
-        self.attach_screenshots(_screenshot_name, _screenshot_suite_name, _screenshot_test_name, _screenshot_error)
+        # screenshots are attached once the worker returns their perceptual hash, see finish_screenshots
+        self.screenshot_jobs.append((job, {
+            'name': _screenshot_name,
+            'suite': _screenshot_suite_name,
+            'test': _screenshot_test_name,
+            'error': _screenshot_error,
+            'nodeid': _test_nodeid,
+            'index': (len(_test_suite_name), len(_scenario) - 1),
+            'base': screen_base,
+            'data': screen_data,
+        }))
         _screenshot_name = ''
         _screenshot_suite_name = ''
         _screenshot_test_name = ''
         _screenshot_error = ''
 
+    def finish_screenshots(self, terminalreporter):
+        if self.screenshot_pool is None: return
+
+        # compare with the hash index the previous build left next to its report
+        with report_lock(self.report_path[0]):
+            previous_hashes = screenshot_hashes(self.report_path[0])
+
+        original_size = encoded_size = 0
+        for job, details in self.screenshot_jobs:
+            data = details.pop('data')
+            try:
+                original, encoded, phash = job.result()
+            except Exception as e:
+                # a crashed worker (BrokenProcessPool) or undecodable image must not lose the screenshot
+                terminalreporter.write_line('pytest-html-reporter: could not encode screenshot %s (%r), '
+                                            'storing it as captured' % (details['name'], e))
+                with open(details['base'] + '/pytest_screenshots/' + details['name'], 'wb') as screenshot_file:
+                    screenshot_file.write(data)
+                original = encoded = len(data)
+                phash = None
+            original_size += original
+            encoded_size += encoded
+
+            previous_hash = previous_hashes.get(details['nodeid'])
+            if phash is None or previous_hash is None:
+                visual_state = 'new'
+            elif hash_distance(previous_hash, phash) > HASH_DIFF_THRESHOLD:
+                visual_state = 'changed'
+            else:
+                visual_state = 'unchanged'
+            if self.async_report: self.events.screenshot(details, phash, visual_state)
+
+            suite_index, test_index = details['index']
+            self.json_data['content']['suites'].setdefault(suite_index, {}).setdefault('tests', {}).setdefault(
+                test_index, {})['screenshot_hash'] = phash
+
+            # attach screenshots
+            self.attach_screenshots(details['name'], details['suite'], details['test'], details['error'],
+                                    visual_state)
+
+        self.screenshot_pool.shutdown()
+        self.screenshot_pool = None
+
+        terminalreporter.write_line(
+            "pytest-html-reporter: %d screenshots stored as %s, %.1f KB -> %.1f KB (saved %.1f KB)" % (
+                len(self.screenshot_jobs), self.screenshot_options['fmt'], original_size / 1024,
+                encoded_size / 1024, (original_size - encoded_size) / 1024)
+        )
+        self.screenshot_jobs = []
+
     def append_suite_metrics_row(self, name):
         global _spass_tests, _sfail_tests, _sskip_tests, _sxpass_tests, _sxfail_tests, _serror_tests, _srerun_tests, \
             _error, _suite_error, _suite_fail
@@ -548,7 +1107,7 @@ class HTMLReporter(object):
 
         suite_row_text = """
             <tr>
-                <td style="word-wrap: break-word;max-width: 200px; white-space: normal; text-align:left">__sname__</td>
+                <td class="metrics-text">__sname__</td>
                 <td>__spass__</td>
                 <td>__sfail__</td>
                 <td>__sskip__</td>
@@ -558,6 +1117,7 @@ class HTMLReporter(object):
                 <td>__srerun__</td>
             </tr>
         """
+        if self.compact: suite_row_text = compact_markup(suite_row_text)
         suite_row_text = suite_row_text.replace("__sname__", str(name))
         suite_row_text = suite_row_text.replace("__spass__", str(_spass_tests))
         suite_row_text = suite_row_text.replace("__sfail__", str(_suite_fail))
@@ -712,7 +1272,7 @@ class HTMLReporter(object):
         template_text = template_text.replace("__xfail__", str(_asxfail))
         template_text = template_text.replace("__rerun__", str(_asrerun))
         template_text = template_text.replace("__suite_metrics_row__", str(_suite_metrics_content))
-        template_text = template_text.replace("__test_metrics_row__", str(_test_metrics_content))
+        template_text = template_text.replace("__resource_headers__", self.resource_headers())
         template_text = template_text.replace("__date__", str(self._date()))
         template_text = template_text.replace("__test_suites__", str(_test_suite_name))
         template_text = template_text.replace("__test_suite_length__", str(len(_test_suite_name)))
@@ -737,6 +1297,83 @@ class HTMLReporter(object):
         template_text = template_text.replace("__tfail__", str(tfail))
         template_text = template_text.replace("__tskip__", str(tskip))
         template_text = template_text.replace("__attach_screenshot_details__", str(_attach_screenshot_details))
+        template_text = self.renew_performance_text(template_text)
+        timeline = encode_timeline(self.timeline)
+        if self.resource_samples is not None: timeline['resources'] = self.resource_samples
+        template_text = template_text.replace("__timeline_data__", script_json(timeline))
+        template_text = template_text.replace("__test_metrics_data__", script_json(_test_metrics.encode()))
+        return template_text
+
+    def renew_performance_text(self, template_text):
+        performance_suite_row_text = """
+            <tr>
+                <td class="metrics-text">__sname__</td>
+                <td>__count__</td>
+                <td>__p50__</td>
+                <td>__p95__</td>
+                <td>__p99__</td>
+                <td>__max__</td>
+            </tr>
+        """
+        slowest_test_row_text = """
+            <tr>
+                <td class="metrics-text">__sname__</td>
+                <td class="metrics-text">__name__</td>
+                <td>__stat__</td>
+                <td>__dur__</td>
+            </tr>
+        """
+
+        if self.compact:
+            performance_suite_row_text = compact_markup(performance_suite_row_text)
+            slowest_test_row_text = compact_markup(slowest_test_row_text)
+
+        performance_suite_rows = ""
+        for suite in self.analytics.suite_order:
+            summary = self.analytics.suites[suite].summary()
+            row_text = performance_suite_row_text.replace("__sname__", str(suite))
+            for key in ('count', 'p50', 'p95', 'p99', 'max'):
+                row_text = row_text.replace("__" + key + "__", str(round(summary[key], 3)))
+            performance_suite_rows += row_text
+
+        slowest_test_rows = ""
+        for duration, (suite, test, status) in self.analytics.slowest.items():
+            row_text = slowest_test_row_text.replace("__sname__", str(suite))
+            row_text = row_text.replace("__name__", str(test))
+            row_text = row_text.replace("__stat__", str(status))
+            row_text = row_text.replace("__dur__", str(round(duration, 3)))
+            slowest_test_rows += row_text
+
+        slowdown_row_text = """
+            <tr>
+                <td class="metrics-text">__sname__</td>
+                <td class="metrics-text">__name__</td>
+                <td>__dur__</td>
+                <td>__baseline__</td>
+                <td>__sigma__</td>
+            </tr>
+        """
+
+        if self.compact: slowdown_row_text = compact_markup(slowdown_row_text)
+        slowdown_rows = ""
+        for slowdown in self.slowdowns:
+            row_text = slowdown_row_text.replace("__sname__", str(slowdown['suite_name']))
+            row_text = row_text.replace("__name__", str(slowdown['test_name']))
+            row_text = row_text.replace("__dur__", str(round(slowdown['duration'], 3)))
+            row_text = row_text.replace("__baseline__", str(round(slowdown['baseline'], 3)))
+            row_text = row_text.replace("__sigma__", str(slowdown['sigma']))
+            slowdown_rows += row_text
+
+        overall = self.analytics.overall.summary()
+        template_text = template_text.replace("__perf_p50__", str(round(overall['p50'], 3)))
+        template_text = template_text.replace("__perf_p95__", str(round(overall['p95'], 3)))
+        template_text = template_text.replace("__perf_p99__", str(round(overall['p99'], 3)))
+        template_text = template_text.replace("__perf_max__", str(round(overall['max'], 3)))
+        template_text = template_text.replace("__perf_mean__", str(round(overall['mean'], 3)))
+        template_text = template_text.replace("__performance_suite_row__", performance_suite_rows)
+        template_text = template_text.replace("__slowest_test_row__", slowest_test_rows)
+        template_text = template_text.replace("__slowdown_row__", slowdown_rows)
+        template_text = template_text.replace("__slowdown_count__", str(len(self.slowdowns)))
         return template_text
 
     def generate_json_data(self, base):
@@ -788,6 +1425,8 @@ class HTMLReporter(object):
         self.json_data.setdefault('status_list', {})['xfail'] = str(_asxfail)
         self.json_data.setdefault('status_list', {})['rerun'] = str(_asrerun)
         self.json_data['total_tests'] = str(_astotal)
+        self.json_data['performance'] = self.analytics.summary()
+        if self.resource_samples is not None: self.json_data['resource_samples'] = self.resource_samples
 
         with open(base + '/output.json', 'w') as outfile:
             json.dump(self.json_data, outfile)
@@ -930,6 +1569,7 @@ class HTMLReporter(object):
                     </div>
                 """
 
+                if self.compact: _archive_body_text = compact_markup(_archive_body_text)
                 if value == "current":
                     _archive_body_text = _archive_body_text.replace("__iloop__", str(i))
                     _archive_body_text = _archive_body_text.replace("__acount__", str(_archive_count))
@@ -1017,13 +1657,16 @@ class HTMLReporter(object):
 
                 if i == 4: break
 
-    def attach_screenshots(self, screen_name, test_suite, test_case, test_error):
+    def attach_screenshots(self, screen_name, test_suite, test_case, test_error, visual_state='new'):
         global _attach_screenshot_details
 
         _screenshot_details = """
-            <div class="img-hover col-md-6 col-xl-3 p-3">
+            <div class="img-hover col-md-6 col-xl-3 p-3 visual-__vstate__">
               <div>
-                <a class="video" href="__screenshot_base__/pytest_screenshots/__screen_name__.png" data-toggle="lightbox" style="background-image: url('__screenshot_base__/pytest_screenshots/__screen_name__.png');" data-fancybox="images" data-caption="SUITE: __ts__ :: SCENARIO: __tc__">
+                <span class="visual-badge">__vlabel__</span>
+                <a class="video" href="__screenshot_base__/pytest_screenshots/__screen_name__"
+                   data-toggle="lightbox" data-fancybox="images" data-caption="SUITE: __ts__ :: SCENARIO: __tc__"
+                   style="background-image: url('__screenshot_base__/pytest_screenshots/__screen_name__');">
                     <span class="video-hover-desc video-hover-small"> <span style="font-size:23px;display: block;margin-bottom: 15px;"> __tc__</span>
                     <span>__te__</span> </span>
                 </a>
@@ -1048,5 +1691,8 @@ class HTMLReporter(object):
         _screenshot_details = _screenshot_details.replace("__tc__", str(test_case))
         _screenshot_details = _screenshot_details.replace("__te__", str(test_error))
         _screenshot_details = _screenshot_details.replace("__screenshot_base__", str(screen_base))
+        _screenshot_details = _screenshot_details.replace("__vstate__", str(visual_state))
+        _screenshot_details = _screenshot_details.replace(
+            "__vlabel__", 'CHANGED SINCE LAST BUILD' if visual_state == 'changed' else '')
 
         _attach_screenshot_details += _screenshot_details
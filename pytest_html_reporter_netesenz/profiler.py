@@ -0,0 +1,98 @@
+import os
+import time
+import tracemalloc
+
+
+class _NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+null_stage = _NullStage()
+
+
+class _Stage(object):
+    """Time one pipeline stage and record its tracemalloc peak.
+
+    Allocations are traced while the stage runs, so its duration includes tracemalloc's overhead and reads higher
+    than it would without ``--html-report-profile``; compare stages against each other, not against unprofiled runs.
+    """
+
+    def __init__(self, profiler, name, paths):
+        self.profiler = profiler
+        self.name = name
+        self.paths = paths
+
+    def __enter__(self):
+        # tracing is only started for the stage unless someone else (--html-report-tracemalloc) already runs it
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self.traced = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.start
+        peak = max(0, tracemalloc.get_traced_memory()[1] - self.traced)
+        if self.started:
+            tracemalloc.stop()
+
+        written = sum(os.path.getsize(path) for path in self.paths if os.path.isfile(path))
+        self.profiler.stages.append({
+            'stage': self.name,
+            'duration_ns': elapsed,
+            'bytes_written': written,
+            'peak_memory': peak,
+        })
+        return False
+
+
+class PhaseProfiler(object):
+    """Timings of the reporter's own report pipeline and per-test hook overhead."""
+
+    def __init__(self):
+        self.stages = []
+        self.hook_ns = 0
+        self.hook_calls = 0
+
+    def stage(self, name, *paths):
+        return _Stage(self, name, paths)
+
+    def add_hook_time(self, start):
+        self.hook_ns += time.perf_counter_ns() - start
+        self.hook_calls += 1
+
+    def summary(self):
+        return {
+            'stages': self.stages,
+            'total_ns': sum(stage['duration_ns'] for stage in self.stages),
+            'hook_ns': self.hook_ns,
+            'hook_calls': self.hook_calls,
+        }
+
+    def lines(self):
+        lines = ['pytest-html-reporter profile:']
+        for stage in self.stages:
+            lines.append('  %-28s %10.2f ms %12s written %12s peak' % (
+                stage['stage'], stage['duration_ns'] / 1e6, format_bytes(stage['bytes_written']),
+                format_bytes(stage['peak_memory'])))
+
+        lines.append('  %-28s %10.2f ms' % ('total', sum(stage['duration_ns'] for stage in self.stages) / 1e6))
+        lines.append('  %-28s %10.2f ms (%d calls, %.1f us/call)' % (
+            'per-test hooks', self.hook_ns / 1e6, self.hook_calls,
+            (self.hook_ns / self.hook_calls / 1e3) if self.hook_calls else 0))
+        return lines
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return '%.1f %s' % (size, unit)
+        size /= 1024
+    return '%.1f GB' % size
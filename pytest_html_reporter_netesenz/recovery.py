@@ -0,0 +1,145 @@
+"""Rebuild output.json and the HTML report from the event log of a session that never finished.
+
+    $ pytest tests/ --html-report=./report --html-report-event-log     # killed by a CI timeout
+    $ python -m pytest_html_reporter_netesenz recover ./report/events.ndjson
+"""
+import argparse
+import os
+import sys
+
+from pytest_html_reporter_netesenz import live, plugin
+from pytest_html_reporter_netesenz.eventlog import read_events
+
+INTERRUPTED = 'Interrupted: the session ended before this test finished'
+# features that watch or steer a live session, they mean nothing when replaying one
+LIVE_OPTIONS = {'event_log': False, 'sampler': False, 'resources': False, 'tracemalloc': False, 'shard': None,
+                'history_order': False, 'profile': False, 'live': False, 'async_report': False}
+
+
+class ReplayPluginManager(object):
+    def __init__(self, plugins):
+        self.plugins = plugins
+
+    def hasplugin(self, name):
+        return name in self.plugins
+
+
+class ReplayConfig(object):
+    def __init__(self, options, plugins=()):
+        self.options = options
+        self.pluginmanager = ReplayPluginManager(plugins)
+
+    def getoption(self, name):
+        return self.options[name]
+
+
+class ReplayReport(object):
+    """Just enough of a pytest TestReport for HTMLReporter.process_report."""
+
+    def __init__(self, nodeid, when, outcome, duration=0.0, longrepr='', wasxfail=None):
+        self.nodeid = nodeid
+        self.when = when
+        self.outcome = outcome
+        self.passed = outcome == 'passed'
+        self.failed = outcome == 'failed'
+        self.skipped = outcome == 'skipped'
+        self.duration = duration
+        self.longreprtext = longrepr or ''
+        self.longrepr = longrepr or None
+        if wasxfail is not None:
+            self.wasxfail = wasxfail
+
+    @classmethod
+    def from_event(cls, event):
+        return cls(event['nodeid'], event['when'], event['outcome'], event['duration'], event.get('longrepr'),
+                   event.get('wasxfail'))
+
+
+def recover(log_path, path=None):
+    """Replay ``log_path`` through a fresh HTMLReporter and write the report. Returns the number of tests."""
+    events = read_events(log_path)
+    if not events or events[0].get('event') != 'session':
+        raise ValueError('%s is not a pytest-html-reporter event log' % log_path)
+    session = events[0]
+    # replaying a finished session would archive its report again and feed its durations into the baselines twice
+    if any(event['event'] == 'finish' and event.get('reported') for event in events):
+        raise ValueError('%s is the log of a session that already wrote its report' % log_path)
+
+    options = plugin.option_defaults()
+    options.update(session['options'])
+    options.update(LIVE_OPTIONS)
+    if path is not None: options['path'] = path
+
+    # reruns are read from the command line, see plugin.max_rerun
+    rerun = session.get('rerun')
+    sys.argv = ['pytest'] + (['--reruns=%d' % rerun] if rerun is not None else [])
+    plugin.custom_title(options['title'])
+    reporter = plugin.HTMLReporter(options['path'], ReplayConfig(options, ('rerunfailures',) if rerun is not None
+                                                                 else ()))
+
+    running, screenshots, live_page, session_end, tests = {}, [], None, session['start'], 0
+    for event in events[1:]:
+        if event['event'] == 'screenshot': screenshots.append(event)
+        if event['event'] == 'live': live_page = event
+        if event['event'] == 'resources': reporter.resource_samples = event['samples']
+        if event['event'] != 'report': continue
+
+        if event['when'] == 'setup': plugin._start_execution_time = event['start']
+        reporter.process_report(ReplayReport.from_event(event), event['name'], event['start'], event['stop'])
+        session_end = max(session_end, event['stop'] or session_end)
+        if event['when'] == 'teardown':
+            running.pop(event['nodeid'], None)
+            tests += 1
+        else:
+            running[event['nodeid']] = event['name']
+
+    # the test that was running when the session died is reported as an error
+    for nodeid, name in running.items():
+        reporter.process_report(ReplayReport(nodeid, 'teardown', 'failed', longrepr=INTERRUPTED), name,
+                                session_end, session_end)
+        tests += 1
+
+    reporter.pytest_sessionfinish(None)
+
+    # screenshots logged by --html-report-async, already encoded and indexed by the pytest process. They stay
+    # where the session stored them, which --html-report may have moved the report away from.
+    for shot in screenshots:
+        plugin.screen_base = shot.get('base', reporter.report_path[0])
+        suite_index, test_index = shot['index']
+        reporter.json_data['content']['suites'].setdefault(suite_index, {}).setdefault('tests', {}).setdefault(
+            test_index, {})['screenshot_hash'] = shot['hash']
+        reporter.attach_screenshots(shot['name'], shot['suite'], shot['test'], shot['error'], shot['visual_state'])
+
+    reporter.write_report(session['start'], session_end=session_end)
+
+    # logged by --html-report-async, whose live page says the report is being written until it is
+    if live_page is not None:
+        report = os.path.join(*reporter.report_path)
+        live.finish_rendered(live_page['directory'], live_page['status'],
+                             os.path.relpath(report, live_page['directory']) if plugin._suite_name else None)
+    return tests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pytest_html_reporter_netesenz recover', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help='event log written with --html-report-event-log')
+    parser.add_argument('--html-report', dest='path', help='where to write the report (default: as in the session)')
+    args = parser.parse_args(argv)
+
+    try:
+        tests = recover(args.log, args.path)
+    except (IOError, ValueError) as e:
+        sys.exit('recover: %s' % e)
+    print('%d tests recovered from %s' % (tests, args.log))
+
+
+def render_main(argv=None):
+    """Entry point of the detached renderer started by --html-report-async; consumes the log it is given."""
+    parser = argparse.ArgumentParser(prog='python -m pytest_html_reporter_netesenz render')
+    parser.add_argument('log', help='event log handed over by the pytest process')
+    args = parser.parse_args(argv)
+
+    tests = recover(args.log)
+    os.remove(args.log)
+    print('%d tests rendered from %s' % (tests, args.log))
@@ -0,0 +1,53 @@
+import os
+import time
+import tracemalloc
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes, 0 where /proc is not available."""
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (IOError, OSError, IndexError, ValueError):
+        return 0
+
+
+class ResourceMeter(object):
+    """Per-test CPU time, RSS growth and, optionally, tracemalloc peak.
+
+    Registered as a pytest plugin only when ``--html-report-resources`` is given, so the default run never pays for it.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.started = {}
+
+    def pytest_configure(self, config):
+        if self.trace_memory and not tracemalloc.is_tracing(): tracemalloc.start()
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.start(nodeid)
+
+    def start(self, nodeid):
+        traced = 0
+        if self.trace_memory and tracemalloc.is_tracing():
+            # reset_peak() is Python 3.9+, older interpreters report the peak since tracing started
+            if hasattr(tracemalloc, 'reset_peak'): tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+        self.started[nodeid] = (time.process_time(), current_rss(), traced)
+
+    def stop(self, nodeid):
+        """Return (cpu_time, rss_delta, memory_peak) since ``start``, or None for an unknown test."""
+        started = self.started.pop(nodeid, None)
+        if started is None: return None
+
+        cpu_start, rss_start, traced_start = started
+        peak = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = max(0, tracemalloc.get_traced_memory()[1] - traced_start)
+        return time.process_time() - cpu_start, current_rss() - rss_start, peak
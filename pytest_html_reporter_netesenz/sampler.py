@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+from pytest_html_reporter_netesenz.resources import current_rss
+
+DEFAULT_INTERVAL = 0.5
+# points embedded in the report per series, longer runs are downsampled
+MAX_POINTS = 1500
+
+try:
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+
+
+def read_process_stat():
+    """(cpu seconds, thread count) of this process, from /proc/self/stat when available."""
+    try:
+        with open('/proc/self/stat', 'rb') as stat:
+            # the command name may contain spaces, fields are counted after its closing parenthesis
+            fields = stat.read().rsplit(b')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / float(CLOCK_TICKS), int(fields[17])
+    except (IOError, OSError, IndexError, ValueError):
+        times = os.times()
+        return times[0] + times[1], threading.active_count()
+
+
+def count_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return 0
+
+
+class ResourceSampler(threading.Thread):
+    """Daemon thread recording process CPU %, RSS, threads and open fds every ``interval`` seconds."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        super(ResourceSampler, self).__init__(name='html-report-sampler')
+        self.daemon = True
+        self.interval = interval
+        self.samples = []
+        self.overhead = 0.0
+        self._stopped = threading.Event()
+
+    def run(self):
+        last_wall = time.time()
+        last_cpu = read_process_stat()[0]
+        while not self._stopped.wait(self.interval):
+            started = time.perf_counter()
+            wall = time.time()
+            cpu, threads = read_process_stat()
+            elapsed = wall - last_wall
+            cpu_percent = 100.0 * (cpu - last_cpu) / elapsed if elapsed > 0 else 0.0
+            self.samples.append((wall, round(cpu_percent, 1), current_rss(), threads, count_fds()))
+            last_wall, last_cpu = wall, cpu
+            self.overhead += time.perf_counter() - started
+
+    def stop(self):
+        self._stopped.set()
+        if self.is_alive(): self.join(self.interval * 2 + 1)
+
+    def summary(self, origin=None, max_points=MAX_POINTS):
+        """Downsampled, column-oriented series with times in ms since ``origin``."""
+        samples = downsample(self.samples, max_points)
+        if origin is None: origin = samples[0][0] if samples else 0
+        return {
+            'interval': self.interval,
+            'overhead': round(self.overhead, 6),
+            'time': [int(round((sample[0] - origin) * 1000)) for sample in samples],
+            'cpu': [sample[1] for sample in samples],
+            'rss': [sample[2] for sample in samples],
+            'threads': [sample[3] for sample in samples],
+            'fds': [sample[4] for sample in samples],
+        }
+
+
+def downsample(samples, max_points):
+    """Merge consecutive samples into at most ``max_points`` buckets.
+
+    CPU is averaged over a bucket, RSS, threads and fds keep their maximum so short spikes stay visible.
+    """
+    if len(samples) <= max_points: return list(samples)
+
+    merged = []
+    size = len(samples) / float(max_points)
+    for bucket in range(max_points):
+        chunk = samples[int(bucket * size):int((bucket + 1) * size)]
+        if not chunk: continue
+        merged.append((
+            chunk[0][0],
+            round(sum(sample[1] for sample in chunk) / len(chunk), 1),
+            max(sample[2] for sample in chunk),
+            max(sample[3] for sample in chunk),
+            max(sample[4] for sample in chunk),
+        ))
+    return merged
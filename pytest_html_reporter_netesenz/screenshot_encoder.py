@@ -0,0 +1,60 @@
+import os
+from io import BytesIO
+from PIL import Image
+
+FORMATS = {
+    'png': ('PNG', 'png'),
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# dhash bits that may differ before two screenshots count as visually different
+HASH_DIFF_THRESHOLD = 5
+
+
+def screenshot_extension(fmt):
+    return FORMATS[fmt][1]
+
+
+def dhash(img, size=8):
+    """64-bit difference hash of an image, returned as a 16 char hex string."""
+    pixels = img.convert('L').resize((size + 1, size), Image.LANCZOS).tobytes()
+
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return '%0*x' % (size * size // 4, value)
+
+
+def hash_distance(hash1, hash2):
+    return bin(int(hash1, 16) ^ int(hash2, 16)).count('1')
+
+
+def encode_screenshot(data, dest, fmt='png', quality=80, max_width=0, grayscale=False):
+    """Encode raw screenshot bytes to ``dest``; runs inside a worker process.
+
+    Returns a tuple of (original size, encoded size, perceptual hash).
+    """
+    img = Image.open(BytesIO(data))
+    phash = dhash(img)
+
+    if fmt == 'png' and not max_width and not grayscale and data[:8] == PNG_SIGNATURE:
+        with open(dest, 'wb') as f:
+            f.write(data)
+        return len(data), len(data), phash
+
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, max(1, round(img.height * max_width / img.width))), Image.LANCZOS)
+
+    if grayscale:
+        img = img.convert('L')
+    elif fmt == 'jpeg' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    options = {'optimize': True} if fmt == 'png' else {'quality': quality}
+    img.save(dest, FORMATS[fmt][0], **options)
+
+    return len(data), os.path.getsize(dest), phash
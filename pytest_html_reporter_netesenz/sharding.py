@@ -0,0 +1,120 @@
+"""Duration-balanced test shards planned from the reporter's history.
+
+    $ python -m pytest_html_reporter_netesenz shard --report ./report --shards 4 --output shards.json
+    $ pytest tests/ --html-report=./report --html-report-shard 2/4 --html-report-shard-file shards.json
+"""
+import argparse
+import heapq
+import json
+import os
+
+from pytest_html_reporter_netesenz.history import historical_durations
+
+SHARD_FILE = 'shards.json'
+# assumed duration of tests the history has never seen
+DEFAULT_DURATION = 1.0
+
+
+def parse_shard(value):
+    """'k/N' -> (k, N) with 1 <= k <= N."""
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError('expected k/N, got %r' % value)
+    if not 1 <= index <= total:
+        raise ValueError('shard %d is outside 1..%d' % (index, total))
+    return index, total
+
+
+def plan_shards(durations, shards):
+    """Longest-processing-time-first bin packing of nodeid -> duration into ``shards`` buckets.
+
+    Returns (assignment, loads) with 1-based shard numbers.
+    """
+    loads = [(0.0, shard) for shard in range(1, shards + 1)]
+    assignment = {}
+    for nodeid, duration in sorted(durations.items(), key=lambda item: (-item[1], item[0])):
+        load, shard = heapq.heappop(loads)
+        assignment[nodeid] = shard
+        heapq.heappush(loads, (load + duration, shard))
+
+    return assignment, [load for load, _ in sorted(loads, key=lambda item: item[1])]
+
+
+def default_duration(durations):
+    """Median historical duration, used for tests without history."""
+    if not durations: return DEFAULT_DURATION
+    values = sorted(durations.values())
+    return values[len(values) // 2]
+
+
+def write_shard_file(path, durations, shards):
+    """Pin the plan of every test in the history for select_shard. Returns the loads of the shards."""
+    assignment, loads = plan_shards(durations, shards)
+    data = {'shards': shards, 'loads': [round(load, 6) for load in loads],
+            'default_duration': default_duration(durations), 'assignment': assignment,
+            'durations': dict((nodeid, round(duration, 6)) for nodeid, duration in durations.items())}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as shard_file:
+        json.dump(data, shard_file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+    return loads
+
+
+def load_shard_file(path):
+    with open(path) as shard_file:
+        return json.load(shard_file)
+
+
+def select_shard(nodeids, shard, shards, durations, assignment=None):
+    """nodeids that belong to ``shard`` of ``shards``.
+
+    Tests in ``assignment``, the plan of a shard file, stay on their planned shard. Without one, only the collected
+    tests are packed, so tests removed since the history was recorded do not skew the shards. Tests without history
+    get the median duration and go to the lightest shards in nodeid order. Every shard process computes the same
+    plan from the same collection and shard file, no coordination is needed.
+    """
+    if assignment is None:
+        assignment, loads = plan_shards(dict((nodeid, durations[nodeid]) for nodeid in nodeids
+                                             if nodeid in durations), shards)
+    else:
+        assignment = dict((nodeid, assignment[nodeid]) for nodeid in nodeids if nodeid in assignment)
+        loads = [0.0] * shards
+        for nodeid, number in assignment.items():
+            loads[number - 1] += durations.get(nodeid, 0.0)
+    fallback = default_duration(durations)
+
+    heap = [(load, number) for number, load in enumerate(loads, 1)]
+    heapq.heapify(heap)
+    selected = []
+    for nodeid in sorted(nodeid for nodeid in nodeids if nodeid not in assignment):
+        load, number = heapq.heappop(heap)
+        heapq.heappush(heap, (load + fallback, number))
+        if number == shard: selected.append(nodeid)
+
+    selected = set(selected)
+    return [nodeid for nodeid in nodeids if assignment.get(nodeid) == shard or nodeid in selected]
+
+
+def shard_count(value):
+    shards = int(value)
+    if shards < 1:
+        raise argparse.ArgumentTypeError('expected 1 or more shards, got %s' % value)
+    return shards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pytest_html_reporter_netesenz shard', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--report', default='.', help='report directory holding output.json and archive/')
+    parser.add_argument('--shards', type=shard_count, required=True, help='number of shards')
+    parser.add_argument('--output', help='shard file to write (default <report>/%s)' % SHARD_FILE)
+    args = parser.parse_args(argv)
+
+    durations = historical_durations(args.report)
+    output = args.output or os.path.join(args.report, SHARD_FILE)
+    loads = write_shard_file(output, durations, args.shards)
+
+    print('%d tests from history planned into %d shards -> %s' % (len(durations), args.shards, output))
+    for number, load in enumerate(loads, 1):
+        print('  shard %d: %.2f s' % (number, load))
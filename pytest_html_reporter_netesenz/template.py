@@ -1,3 +1,13 @@
+import re
+
+INTER_TAG_SPACE = re.compile(r'>\s+<')
+
+
+def compact_markup(text):
+    """Markup without the indentation between tags. Only for row templates, before any value is filled in."""
+    return INTER_TAG_SPACE.sub('><', text).strip()
+
+
 def html_template():
     return """
 	<!DOCTYPE doctype html>
@@ -9,6 +19,7 @@ def html_template():
             <meta content="width=device-width, initial-scale=1" name="viewport" />
             <link href="https://cdn.datatables.net/1.10.19/css/jquery.dataTables.min.css" rel="stylesheet" crossorigin="anonymous"/>
             <link href="https://cdn.datatables.net/buttons/1.5.2/css/buttons.dataTables.min.css" rel="stylesheet" crossorigin="anonymous" />
+            <link href="https://cdn.datatables.net/scroller/1.5.1/css/scroller.dataTables.min.css" rel="stylesheet" crossorigin="anonymous" />
             <link href="https://cdnjs.cloudflare.com/ajax/libs/twitter-bootstrap/4.1.3/css/bootstrap.min.css" rel="stylesheet" crossorigin="anonymous" />
             <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/4.7.0/css/font-awesome.min.css" rel="stylesheet" crossorigin="anonymous"/>
             <script src="https://cdn.jsdelivr.net/npm/jquery@3.5.1/dist/jquery.min.js"></script>
@@ -26,6 +37,7 @@ def html_template():
             <script src="https://cdn.datatables.net/buttons/1.5.2/js/buttons.html5.min.js" type="text/javascript"></script>
             <script src="https://cdn.datatables.net/buttons/1.5.2/js/buttons.print.min.js" type="text/javascript"></script>
             <script src="https://cdn.datatables.net/buttons/1.6.1/js/buttons.colVis.min.js" type="text/javascript"></script>
+            <script src="https://cdn.datatables.net/scroller/1.5.1/js/dataTables.scroller.min.js" type="text/javascript"></script>
             <script src="https://cdn.jsdelivr.net/npm/chart.js@2.8.0" type="text/javascript"></script>
 
             <style>
@@ -86,6 +98,90 @@ def html_template():
                     background-color: white;
                     font-size: 14px;
                 }
+
+                .tablecard td.metrics-text {
+                    word-wrap: break-word;
+                    max-width: 200px;
+                    white-space: normal;
+                    text-align: left;
+                }
+
+                /* Scroller needs rows of one height */
+                .tablecard.scroll-view td {
+                    white-space: nowrap;
+                    overflow: hidden;
+                    text-overflow: ellipsis;
+                }
+
+                .tablecard.scroll-view td.metrics-text {
+                    white-space: nowrap;
+                }
+                
+                .perf-summary {
+                    background-color: white;
+                    margin: 10px 0 20px 0;
+                    padding: 15px 0;
+                    text-align: center;
+                }
+                
+                .perf-stat__data {
+                    font-size: 1.8rem;
+                    color: #50597b;
+                }
+                
+                .perf-stat__label {
+                    font-size: 0.8rem;
+                    color: darkgrey;
+                }
+                
+                .perf-header {
+                    margin: 30px 0 10px 0;
+                    color: dimgrey;
+                }
+                
+                .timeline-card {
+                    background-color: white;
+                    margin-top: 10px;
+                    padding: 15px;
+                }
+                
+                .timeline-toolbar {
+                    font-size: 0.8rem;
+                    color: dimgrey;
+                    margin-bottom: 10px;
+                }
+                
+                .timeline-legend i {
+                    display: inline-block;
+                    width: 10px;
+                    height: 10px;
+                    margin: 0 4px 0 10px;
+                }
+                
+                .timeline-hint {
+                    float: right;
+                }
+                
+                .timeline-wrapper {
+                    position: relative;
+                    width: 100%;
+                }
+                
+                #timeline-canvas {
+                    cursor: grab;
+                }
+                
+                .timeline-tooltip {
+                    display: none;
+                    position: absolute;
+                    pointer-events: none;
+                    padding: 6px 10px;
+                    font-size: 0.8rem;
+                    background-color: white;
+                    border: 2px solid #555555;
+                    border-radius: 3px;
+                    white-space: nowrap;
+                }
                 tr {
                     height: 40px;
                 }
@@ -431,6 +527,21 @@ def html_template():
                 }
                  .img-hover .text-desc {
                      display: none;
+                }
+                 .visual-changed .video {
+                     box-shadow: 0 0 0 4px #fc6766;
+                }
+                 .visual-badge {
+                     display: none;
+                }
+                 .visual-changed .visual-badge {
+                     display: inline-block;
+                     margin-bottom: 6px;
+                     padding: 2px 8px;
+                     border-radius: 3px;
+                     font-size: 0.75rem;
+                     color: white;
+                     background-color: #fc6766;
                 }
                  .below-desc {
                      display: block;
@@ -471,6 +582,10 @@ def html_template():
                 .modal p {
                     word-wrap: break-word;
                 }
+
+                #error-modal-text {
+                    white-space: pre-wrap;
+                }
                 
                 .modal-footer {
                     border-top: 0px solid #e9ecef;
@@ -753,6 +868,12 @@ def html_template():
             <a class="tablink" href="#test-metrics" onclick="openPage('testMetrics', this, 'white', '#565656', 'groove'); executeDataTable('#tm',3)">
                 <i class="fa fa-server" id="tablinkicon" style="color:currentcolor; margin:5% 5% 5% 10%"></i> Test Metrics
             </a>
+            <a class="tablink" href="#performance" onclick="openPage('performance', this, 'white', '#565656', 'groove'); executeDataTable('#pm',3)">
+                <i class="fa fa-tachometer" id="tablinkicon" style="color:currentcolor; margin:5% 5% 5% 10%"></i> Performance
+            </a>
+            <a class="tablink" href="#timeline" onclick="openPage('timeline', this, 'white', '#565656', 'groove'); drawTimeline()">
+                <i class="fa fa-align-left" id="tablinkicon" style="color:currentcolor; margin:5% 5% 5% 10%"></i> Timeline
+            </a>
             <a class="tablink" href="#archives" onclick="openPage('archives', this, 'white', '#565656', 'groove');">
                 <i class="fa fa-history" id="tablinkicon" style="color:currentcolor; margin:5% 5% 5% 10%"></i> Archives
             </a>
@@ -929,17 +1050,102 @@ def html_template():
                         <th>Test Case</th>
                         <th>Status</th>
                         <th>Time (s)</th>
+                        <th>Setup (s)</th>
+                        <th>Call (s)</th>
+                        <th>Teardown (s)</th>
+                        __resource_headers__
                         <th>Error Message</th>
                     </tr>
                 </thead>
+                <tbody></tbody>
+            </table>
+            <div class="modal fade" id="error-modal" tabindex="-1" role="dialog" aria-hidden="true">
+                <div class="modal-dialog">
+                    <div class="modal-content">
+                        <div class="modal-body">
+                            <p>
+                                <svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true" focusable="false" width="1.12em" height="1em" style="-ms-transform: rotate(360deg); -webkit-transform: rotate(360deg); transform: rotate(360deg);" preserveAspectRatio="xMidYMid meet" viewBox="0 0 1856 1664"><path d="M1056 1375v-190q0-14-9.5-23.5t-22.5-9.5H832q-13 0-22.5 9.5T800 1185v190q0 14 9.5 23.5t22.5 9.5h192q13 0 22.5-9.5t9.5-23.5zm-2-374l18-459q0-12-10-19q-13-11-24-11H818q-11 0-24 11q-10 7-10 21l17 457q0 10 10 16.5t24 6.5h185q14 0 23.5-6.5t10.5-16.5zm-14-934l768 1408q35 63-2 126q-17 29-46.5 46t-63.5 17H160q-34 0-63.5-17T50 1601q-37-63-2-126L816 67q17-31 47-49t65-18t65 18t47 49z" fill="#DC143C"/></svg>
+                                <span id="error-modal-text"></span>
+                            </p>
+                        </div>
+                        <div class="modal-footer">
+                            <button type="button" class="btn btn-primary" data-dismiss="modal">Close</button>
+                        </div>
+                    </div>
+                </div>
+            </div>
+            <div class="row">
+                <div class="col-md-12" style="height:25px;width:auto;"></div>
+            </div>
+        </div>
+        <div class="tabcontent" id="performance">
+            <div class="row rowcard perf-summary">
+                <div class="col perf-stat"><div class="perf-stat__data">__perf_p50__</div><div class="perf-stat__label">P50 (s)</div></div>
+                <div class="col perf-stat"><div class="perf-stat__data">__perf_p95__</div><div class="perf-stat__label">P95 (s)</div></div>
+                <div class="col perf-stat"><div class="perf-stat__data">__perf_p99__</div><div class="perf-stat__label">P99 (s)</div></div>
+                <div class="col perf-stat"><div class="perf-stat__data">__perf_max__</div><div class="perf-stat__label">MAX (s)</div></div>
+                <div class="col perf-stat"><div class="perf-stat__data">__perf_mean__</div><div class="perf-stat__label">MEAN (s)</div></div>
+            </div>
+            <table class="table row-border tablecard" id="pm">
+                <thead>
+                    <tr>
+                        <th>Suite</th>
+                        <th>Tests</th>
+                        <th>P50 (s)</th>
+                        <th>P95 (s)</th>
+                        <th>P99 (s)</th>
+                        <th>Max (s)</th>
+                    </tr>
+                </thead>
                 <tbody>
-                    __test_metrics_row__
+                    __performance_suite_row__
+                </tbody>
+            </table>
+            <h5 class="perf-header">Slowest tests</h5>
+            <table class="table row-border tablecard" id="st">
+                <thead>
+                    <tr>
+                        <th>Suite</th>
+                        <th>Test Case</th>
+                        <th>Status</th>
+                        <th>Time (s)</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    __slowest_test_row__
+                </tbody>
+            </table>
+            <h5 class="perf-header">Slowdowns <span class="badge badge-secondary">__slowdown_count__</span></h5>
+            <table class="table row-border tablecard" id="sd">
+                <thead>
+                    <tr>
+                        <th>Suite</th>
+                        <th>Test Case</th>
+                        <th>Time (s)</th>
+                        <th>Baseline (s)</th>
+                        <th>Deviation (&sigma;)</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    __slowdown_row__
                 </tbody>
             </table>
             <div class="row">
                 <div class="col-md-12" style="height:25px;width:auto;"></div>
             </div>
         </div>
+        <div class="tabcontent" id="timeline">
+            <div class="timeline-card">
+                <div class="timeline-toolbar">
+                    <span class="timeline-legend"><i style="background:#98cc64"></i>PASS <i style="background:#fc6766"></i>FAIL <i style="background:#ffd050"></i>SKIP <i style="background:#aaaaaa"></i>XPASS <i style="background:#d35fbf"></i>XFAIL <i style="background:#b13635"></i>ERROR</span>
+                    <span class="timeline-hint">scroll to zoom, drag to pan, double click to reset</span>
+                </div>
+                <div class="timeline-wrapper">
+                    <canvas id="timeline-canvas"></canvas>
+                    <div id="timeline-tooltip" class="timeline-tooltip"></div>
+                </div>
+            </div>
+        </div>
         <div class="tabcontent" id="archives">
             <div id="list-example" class="list-group archive-build-row">
                 __archive_status__
@@ -1040,7 +1246,7 @@ def html_template():
             }
         </script>
         <script>
-            function executeDataTable(tabname, sortCol) {
+            function executeDataTable(tabname, sortCol, view) {
                 var fileTitle;
                 switch (tabname) {
                     case "#sm":
@@ -1049,55 +1255,90 @@ def html_template():
                     case "#tm":
                         fileTitle = "TestMetrics";
                         break;
+                    case "#pm":
+                        fileTitle = "Performance";
+                        break;
                     default:
                         fileTitle = "metrics";
                 }
-                $(tabname).DataTable({
-                    retrieve: true,
+                var rows = {}, exportData = null, exportAction = function (button) { return undefined; };
+                if (tabname == "#tm") {
+                    exportData = exportTestMetrics;
+                    exportAction = exportTestMetricsAction;
+                    rows = {
+                        serverSide: true,
+                        ajax: testMetricsQuery,
+                        searchDelay: 50,
+                        infoCallback: testMetricsInfo,
+                        columns: testMetricsColumns()
+                    };
+                    if (view) {
+                        rows.order = view.order;
+                        rows.search = {search: view.search};
+                        if (view.scroll) {
+                            // "All" scrolls through a window of rows instead of drawing every one of them
+                            $.extend(rows, {scrollY: '65vh', scrollCollapse: true, scroller: {displayBuffer: 6}});
+                        } else {
+                            rows.pageLength = view.pageLength;
+                        }
+                    }
+                    $(tabname).toggleClass('scroll-view', Boolean(view && view.scroll));
+                }
+                var table = $(tabname).DataTable($.extend({
                     "order": [
                         [Number(sortCol), "desc"]
-                    ],
+                    ]
+                }, rows, {
+                    retrieve: true,
                     dom: 'l<".margin" B>frtip',
                     "lengthMenu": [[10, 25, 50, 100, -1], [10, 25, 50, 100, "All"]],
                     buttons: [
                     {
                         extend:    'copyHtml5',
+                        action:    exportAction('copyHtml5'),
                         text:      '<i class="fa fa-files-o"></i>',
                         filename: function() {
                             return fileTitle + '-' + new Date().toLocaleString();
                         },
                         titleAttr: 'Copy',
                         exportOptions: {
+                            customizeData: exportData,
                             columns: ':visible'
                         }
 					},
                     {
                         extend:    'csvHtml5',
+                        action:    exportAction('csvHtml5'),
                         text:      '<i class="fa fa-file-text-o"></i>',
                         titleAttr: 'CSV',
                         filename: function() {
                             return fileTitle + '-' + new Date().toLocaleString();
                         },
                         exportOptions: {
+                            customizeData: exportData,
                             columns: ':visible'
                         }
                     },
                     {
                         extend:    'excelHtml5',
+                        action:    exportAction('excelHtml5'),
                         text:      '<i class="fa fa-file-excel-o"></i>',
                         titleAttr: 'Excel',
                         filename: function() {
                             return fileTitle + '-' + new Date().toLocaleString();
                         },
                         exportOptions: {
+                            customizeData: exportData,
                             columns: ':visible'
                         }
                     },
                     {
                         extend:    'print',
+                        action:    exportAction('print'),
                         text:      '<i class="fa fa-print"></i>',
                         titleAttr: 'Print',
                         exportOptions: {
+                            customizeData: exportData,
                             columns: ':visible',
                             alignment: 'left',
                         }
@@ -1116,9 +1357,492 @@ def html_template():
                 columnDefs: [ {
                     visible: false,
                 } ]
-                }
+                })
             );
+            if (tabname == "#tm") bindTestMetricsView(table, sortCol);
         }
+
+        function bindTestMetricsView(table, sortCol) {
+            // switching between pages and the scrolling "All" view rebuilds the table, keeping order and search
+            var scrolling = Boolean(table.settings()[0].oScroller), rebuilding = false;
+            if (scrolling) {
+                $(table.table().container()).find('.dataTables_length select').val('-1');
+                // row heights were measured while the tab may have been hidden
+                table.scroller.measure();
+            }
+            table.off('.view');
+            table.on('length.dt.view', function (e, settings, len) {
+                if ((len === -1) === scrolling) return;
+                rebuilding = true;
+                var view = {scroll: len === -1, pageLength: len, order: table.order(), search: table.search()};
+                setTimeout(function () {
+                    table.destroy();
+                    executeDataTable('#tm', sortCol, view);
+                }, 0);
+            });
+            // the length change draws once more before the rebuild, with "All" that would render every row
+            table.on('preDraw.dt.view', function () {
+                return !rebuilding;
+            });
+        }
+        </script>
+        <script type="application/json" id="test-metrics-data">__test_metrics_data__</script>
+        <script type="text/js-worker" id="test-metrics-worker">
+            // Runs in a Web Worker: decodes the embedded rows and answers the table's queries off the main thread.
+            var rows = null, statuses = null, statusNames = [], index = null, sorted = {}, result = new Int32Array(0);
+
+            function load(text) {
+                var data = JSON.parse(text), strings = data.strings, n = data.suite.length;
+                var statusIds = {};
+                rows = new Array(n);
+                statuses = new Uint8Array(n);
+                for (var i = 0; i < n; i++) {
+                    var row = [strings[data.suite[i]], strings[data.name[i]], strings[data.status[i]],
+                               data.duration[i], data.setup[i], data.call[i], data.teardown[i]];
+                    for (var c = 0; c < data.resources.length; c++) row.push(data.resources[c][i]);
+                    row.push(strings[data.message[i]]);
+                    rows[i] = row;
+                    if (!(row[2] in statusIds)) {
+                        statusIds[row[2]] = statusNames.length;
+                        statusNames.push(row[2]);
+                    }
+                    statuses[i] = statusIds[row[2]];
+                }
+
+                var postings = new Array(data.index.postings.length);
+                for (var t = 0; t < postings.length; t++) {
+                    var deltas = data.index.postings[t], ids = new Int32Array(deltas.length), id = 0;
+                    for (var d = 0; d < deltas.length; d++) {
+                        id += deltas[d];
+                        ids[d] = id;
+                    }
+                    postings[t] = ids;
+                }
+                index = {tokens: data.index.tokens, postings: postings};
+            }
+
+            // per row the number of query terms it holds inside one of its tokens, null for an empty query.
+            // Terms are matched as substrings, so 'error' finds 'assertionerror'; the token list is scanned
+            // whole, it only holds every distinct word once however many rows share it.
+            function searchRows(query, n) {
+                var terms = query.toLowerCase().match(/[\\p{L}\\p{N}]+/gu);
+                if (!terms) return null;
+                var hits = new Uint8Array(n), tokens = index.tokens;
+                terms = terms.slice(0, 255);
+                for (var q = 0; q < terms.length; q++) {
+                    var term = terms[q], found = false;
+                    for (var t = 0; t < tokens.length; t++) {
+                        if (tokens[t].indexOf(term) === -1) continue;
+                        var ids = index.postings[t];
+                        // a row counts once per term, however many of its tokens contain the term
+                        for (var i = 0; i < ids.length; i++) {
+                            if (hits[ids[i]] === q) hits[ids[i]] = q + 1;
+                        }
+                        found = true;
+                    }
+                    if (!found) return {hits: hits, terms: -1};
+                }
+                return {hits: hits, terms: terms.length};
+            }
+
+            function sortedRows(column) {
+                if (sorted[column]) return sorted[column];
+                var order = new Array(rows.length);
+                for (var i = 0; i < rows.length; i++) order[i] = i;
+                order.sort(function (a, b) {
+                    var x = rows[a][column], y = rows[b][column];
+                    if (x === y) return a - b;
+                    if (x === null) return -1;
+                    if (y === null) return 1;
+                    return x < y ? -1 : 1;
+                });
+                sorted[column] = Int32Array.from(order);
+                return sorted[column];
+            }
+
+            // DataTables server-side processing: filter, sort, count by status and cut out the requested page
+            function query(request) {
+                var n = rows.length, match = searchRows(request.search, n);
+                var sort = request.order || {column: 3, dir: 'desc'};
+                var order = sortedRows(sort.column), ids = new Int32Array(n), count = 0;
+                var counts = new Int32Array(statusNames.length), byStatus = {};
+                var desc = sort.dir === 'desc';
+                for (var i = 0; i < n; i++) {
+                    var id = order[desc ? n - 1 - i : i];
+                    if (match === null || match.hits[id] === match.terms) {
+                        ids[count++] = id;
+                        counts[statuses[id]]++;
+                    }
+                }
+                result = ids.subarray(0, count);
+                for (var s = 0; s < statusNames.length; s++) {
+                    if (counts[s]) byStatus[statusNames[s]] = counts[s];
+                }
+
+                var end = request.length < 0 ? count : Math.min(count, request.start + request.length);
+                var page = [];
+                for (var p = request.start; p < end; p++) {
+                    // the full message stays here until its row asks for it
+                    var row = rows[result[p]].slice(), message = row[row.length - 1];
+                    row[row.length - 1] = message.substring(0, 50);
+                    row.push(result[p], message.length >= 49);
+                    page.push(row);
+                }
+                return {draw: request.draw, recordsTotal: n, recordsFiltered: count, data: page, counts: byStatus};
+            }
+
+            // every row of the last query as export text, not only the page the table holds
+            function exportRows(columns) {
+                var body = new Array(result.length);
+                for (var i = 0; i < result.length; i++) {
+                    var row = rows[result[i]], line = new Array(columns.length);
+                    for (var c = 0; c < columns.length; c++) {
+                        line[c] = row[columns[c]] === null ? '' : String(row[columns[c]]);
+                    }
+                    body[i] = line;
+                }
+                return body;
+            }
+
+            self.onmessage = function (e) {
+                var message = e.data;
+                if (message.type === 'load') return load(message.text);
+                var answer;
+                if (message.type === 'query') answer = query(message.request);
+                else if (message.type === 'export') answer = exportRows(message.columns);
+                else answer = rows[message.row][rows[message.row].length - 1];
+                self.postMessage({id: message.id, result: answer});
+            };
+        </script>
+        <script>
+            var testMetricsWorker = null;
+            var testMetricsCallbacks = {};
+            var testMetricsRequests = 0;
+            var testMetricsCounts = {};
+            var testMetricsExport = null;
+
+            function startTestMetricsWorker() {
+                if (testMetricsWorker !== null) return testMetricsWorker;
+                var source = document.getElementById('test-metrics-worker').textContent;
+
+                function receive(e) {
+                    var callback = testMetricsCallbacks[e.data.id];
+                    delete testMetricsCallbacks[e.data.id];
+                    callback(e.data.result);
+                }
+
+                try {
+                    // a Blob URL, so the worker also starts for reports opened from file://
+                    var url = URL.createObjectURL(new Blob([source], {type: 'application/javascript'}));
+                    testMetricsWorker = new Worker(url);
+                    testMetricsWorker.onmessage = receive;
+                } catch (error) {
+                    // no workers available: the same code answers on the main thread
+                    var scope = {postMessage: function (message) { receive({data: message}); }};
+                    new Function('self', source)(scope);
+                    testMetricsWorker = {postMessage: function (message) { scope.onmessage({data: message}); }};
+                }
+                testMetricsWorker.postMessage({type: 'load', text: document.getElementById('test-metrics-data').textContent});
+                return testMetricsWorker;
+            }
+
+            function testMetricsRequest(message, callback) {
+                message.id = ++testMetricsRequests;
+                testMetricsCallbacks[message.id] = callback;
+                startTestMetricsWorker().postMessage(message);
+            }
+
+            function testMetricsQuery(request, callback) {
+                testMetricsRequest({type: 'query', request: {
+                    search: request.search.value, order: request.order.length ? request.order[0] : null,
+                    start: request.start, length: request.length, draw: request.draw
+                }}, function (result) {
+                    testMetricsCounts = result.counts;
+                    callback(result);
+                });
+            }
+
+            function testMetricsInfo(settings, start, end, max, total, pre) {
+                var counts = [];
+                for (var status in testMetricsCounts) counts.push(status + ' ' + testMetricsCounts[status]);
+                return counts.length ? pre + ' (' + counts.join(', ') + ')' : pre;
+            }
+
+            // export buttons wait for the worker to hand over every matching row, then run the stock action
+            function exportTestMetricsAction(button) {
+                return function (e, dt, node, config) {
+                    var self = this;
+                    var columns = dt.columns(':visible').indexes().toArray();
+                    testMetricsRequest({type: 'export', columns: columns}, function (body) {
+                        testMetricsExport = body;
+                        try {
+                            $.fn.dataTable.ext.buttons[button].action.call(self, e, dt, node, config);
+                        } finally {
+                            testMetricsExport = null;
+                        }
+                    });
+                };
+            }
+
+            function exportTestMetrics(data) {
+                if (testMetricsExport !== null) data.body = testMetricsExport;
+            }
+
+            function escapeHtml(value) {
+                return String(value).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+                    .replace(/"/g, '&quot;');
+            }
+
+            function renderText(value, type) {
+                return type === 'display' ? escapeHtml(value) : value;
+            }
+
+            // rows from the worker end with their row id and whether the message was cut short
+            function renderMessage(value, type, row) {
+                if (type !== 'display' || !row[row.length - 1]) return type === 'display' ? escapeHtml(value) : value;
+                return escapeHtml(value) + ' <a class="error-detail" href="#error-modal" data-row="' +
+                    row[row.length - 2] + '">(...)</a>';
+            }
+
+            $(document).on('click', '#tm a.error-detail', function (e) {
+                e.preventDefault();
+                testMetricsRequest({type: 'message', row: Number($(this).attr('data-row'))}, function (message) {
+                    $('#error-modal-text').text(message);
+                    $('#error-modal').modal('show');
+                });
+            });
+
+            function testMetricsColumns() {
+                var text = {className: 'metrics-text', render: renderText};
+                var columns = [text, text, null, null, null, null, null];
+                // the optional resource columns sit between Teardown and Error Message
+                for (var c = $('#tm thead th').length - 8; c > 0; c--) {
+                    columns.push({defaultContent: ''});
+                }
+                columns.push({className: 'metrics-text', render: renderMessage});
+                return columns;
+            }
+        </script>
+        <script>
+            var timelineData = __timeline_data__;
+            var timelineView = null;
+            var timelineColors = ['#98cc64', '#fc6766', '#ffd050', '#aaaaaa', '#d35fbf', '#b13635'];
+
+            function decodeTimeline(data) {
+                var n = data.start.length, total = 0, span = 1, lanes = [];
+                var start = new Float64Array(n), end = new Float64Array(n);
+                for (var w = 0; w < data.workers.length; w++) lanes.push([]);
+                for (var i = 0; i < n; i++) {
+                    total += data.start[i];
+                    start[i] = total;
+                    end[i] = total + data.duration[i];
+                    if (end[i] > span) span = end[i];
+                    lanes[data.worker[i]].push(i);
+                }
+                // resource samples start before the first test (collection) and may outlive the last one
+                var res = data.resources, min = 0, cpuMax = 100, rssMax = 1;
+                if (res && res.time.length) {
+                    min = Math.min(0, res.time[0]);
+                    span = Math.max(span, res.time[res.time.length - 1]);
+                    for (var j = 0; j < res.time.length; j++) {
+                        cpuMax = Math.max(cpuMax, res.cpu[j]);
+                        rssMax = Math.max(rssMax, res.rss[j]);
+                    }
+                }
+                return {start: start, end: end, lanes: lanes, min: min, span: span, from: min, to: span,
+                        res: res && res.time.length ? res : null, cpuMax: cpuMax, rssMax: rssMax};
+            }
+
+            // index of the last resource sample taken at or before time t
+            function sampleAt(res, t) {
+                var lo = 0, hi = res.time.length;
+                while (lo < hi) {
+                    var mid = (lo + hi) >> 1;
+                    if (res.time[mid] <= t) lo = mid + 1; else hi = mid;
+                }
+                return Math.max(0, lo - 1);
+            }
+
+            function drawResourceChart(ctx, v, series, max, y, color) {
+                var res = v.res, first = sampleAt(res, v.from);
+                ctx.strokeStyle = color;
+                ctx.lineWidth = 1.5;
+                ctx.beginPath();
+                for (var k = first; k < res.time.length; k++) {
+                    var x = v.labelWidth + (res.time[k] - v.from) * v.scale;
+                    var sy = y + v.chartHeight - 4 - (series[k] / max) * (v.chartHeight - 8);
+                    if (k === first) ctx.moveTo(x, sy); else ctx.lineTo(x, sy);
+                    if (res.time[k] > v.to) break;
+                }
+                ctx.stroke();
+            }
+
+            function formatMs(ms) {
+                if (ms < 0) return '-' + formatMs(-ms);
+                if (ms < 1000) return Math.round(ms) + 'ms';
+                if (ms < 60000) return (ms / 1000).toFixed(1) + 's';
+                var secs = Math.round(ms / 1000);
+                return Math.floor(secs / 60) + 'm' + ('0' + (secs % 60)).slice(-2) + 's';
+            }
+
+            function niceStep(raw) {
+                var pow = Math.pow(10, Math.floor(Math.log10(Math.max(raw, 1e-3))));
+                var steps = [1, 2, 5, 10];
+                for (var i = 0; i < steps.length; i++) {
+                    if (steps[i] * pow >= raw) return steps[i] * pow;
+                }
+                return 10 * pow;
+            }
+
+            // index of the first bar in a lane (sorted by start) that may still be visible at time t
+            function firstVisible(lane, t) {
+                var lo = 0, hi = lane.length;
+                while (lo < hi) {
+                    var mid = (lo + hi) >> 1;
+                    if (timelineView.start[lane[mid]] < t) lo = mid + 1; else hi = mid;
+                }
+                return Math.max(0, lo - 1);
+            }
+
+            function drawTimeline() {
+                var canvas = document.getElementById('timeline-canvas');
+                if (timelineView === null) {
+                    timelineView = decodeTimeline(timelineData);
+                    bindTimelineEvents(canvas);
+                }
+                var v = timelineView, ratio = window.devicePixelRatio || 1;
+                v.labelWidth = 70;
+                v.laneHeight = 22;
+                v.axis = 24;
+                v.chartHeight = 60;
+                v.chartTop = v.axis + v.lanes.length * v.laneHeight + 10;
+                var width = canvas.parentNode.clientWidth, height = v.chartTop + (v.res ? 2 * v.chartHeight : 0);
+                canvas.width = width * ratio;
+                canvas.height = height * ratio;
+                canvas.style.width = width + 'px';
+                canvas.style.height = height + 'px';
+
+                var ctx = canvas.getContext('2d');
+                ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+                ctx.clearRect(0, 0, width, height);
+                ctx.font = '11px sans-serif';
+                v.scale = (width - v.labelWidth) / (v.to - v.from);
+
+                var step = niceStep((v.to - v.from) / 8);
+                ctx.fillStyle = '#888888';
+                for (var t = Math.ceil(v.from / step) * step; t <= v.to; t += step) {
+                    var tx = v.labelWidth + (t - v.from) * v.scale;
+                    ctx.fillRect(tx, v.axis - 6, 1, height - v.axis);
+                    ctx.fillText(formatMs(t), tx + 2, 12);
+                }
+
+                for (var w = 0; w < v.lanes.length; w++) {
+                    var lane = v.lanes[w], y = v.axis + w * v.laneHeight, lastX = -1, lastStatus = -1;
+                    ctx.fillStyle = '#555555';
+                    ctx.fillText(timelineData.workers[w], 4, y + 15);
+                    for (var k = firstVisible(lane, v.from); k < lane.length; k++) {
+                        var i = lane[k];
+                        if (v.start[i] > v.to) break;
+                        if (v.end[i] < v.from) continue;
+                        var x = v.labelWidth + (Math.max(v.start[i], v.from) - v.from) * v.scale;
+                        var x2 = v.labelWidth + (Math.min(v.end[i], v.to) - v.from) * v.scale;
+                        var status = timelineData.status[i];
+                        // bars narrower than a pixel collapse into one pixel per status
+                        if (x2 - x < 1) {
+                            if (Math.floor(x) === lastX && status === lastStatus) continue;
+                            x2 = x + 1;
+                        }
+                        ctx.fillStyle = timelineColors[status];
+                        ctx.fillRect(x, y + 3, x2 - x, v.laneHeight - 6);
+                        lastX = Math.floor(x);
+                        lastStatus = status;
+                    }
+                }
+
+                if (v.res) {
+                    ctx.save();
+                    ctx.beginPath();
+                    ctx.rect(v.labelWidth, v.chartTop, width - v.labelWidth, 2 * v.chartHeight);
+                    ctx.clip();
+                    drawResourceChart(ctx, v, v.res.cpu, v.cpuMax, v.chartTop, '#4f81bd');
+                    drawResourceChart(ctx, v, v.res.rss, v.rssMax, v.chartTop + v.chartHeight, '#f79646');
+                    ctx.restore();
+                    ctx.fillStyle = '#555555';
+                    ctx.fillText('CPU %', 4, v.chartTop + 15);
+                    ctx.fillText('RSS', 4, v.chartTop + v.chartHeight + 15);
+                    ctx.fillStyle = '#dddddd';
+                    ctx.fillRect(v.labelWidth, v.chartTop, width - v.labelWidth, 1);
+                    ctx.fillRect(v.labelWidth, v.chartTop + v.chartHeight, width - v.labelWidth, 1);
+                }
+            }
+
+            function formatMb(bytes) {
+                return (bytes / 1048576).toFixed(1) + ' MB';
+            }
+
+            function timelineBarAt(offsetX, offsetY) {
+                var v = timelineView, w = Math.floor((offsetY - v.axis) / v.laneHeight);
+                if (w < 0 || w >= v.lanes.length || offsetX < v.labelWidth) return -1;
+                var t = v.from + (offsetX - v.labelWidth) / v.scale, lane = v.lanes[w];
+                var k = firstVisible(lane, t);
+                for (; k < lane.length && v.start[lane[k]] <= t; k++) {
+                    if (v.end[lane[k]] + 1 / v.scale >= t) return lane[k];
+                }
+                return -1;
+            }
+
+            function bindTimelineEvents(canvas) {
+                var tooltip = document.getElementById('timeline-tooltip'), dragX = null, pending = false;
+                function redraw() {
+                    if (pending) return;
+                    pending = true;
+                    window.requestAnimationFrame(function () { pending = false; drawTimeline(); });
+                }
+                canvas.addEventListener('wheel', function (e) {
+                    e.preventDefault();
+                    var v = timelineView, t = v.from + (e.offsetX - v.labelWidth) / v.scale;
+                    var factor = e.deltaY > 0 ? 1.25 : 0.8;
+                    var from = t - (t - v.from) * factor, to = t + (v.to - t) * factor;
+                    v.from = Math.max(v.min, from);
+                    v.to = Math.min(v.span, Math.max(to, v.from + 1));
+                    redraw();
+                });
+                canvas.addEventListener('mousedown', function (e) { dragX = e.offsetX; canvas.style.cursor = 'grabbing'; });
+                window.addEventListener('mouseup', function () { dragX = null; canvas.style.cursor = 'grab'; });
+                canvas.addEventListener('dblclick', function () { timelineView.from = timelineView.min; timelineView.to = timelineView.span; redraw(); });
+                canvas.addEventListener('mouseleave', function () { tooltip.style.display = 'none'; });
+                canvas.addEventListener('mousemove', function (e) {
+                    var v = timelineView;
+                    if (dragX !== null) {
+                        var shift = (dragX - e.offsetX) / v.scale, range = v.to - v.from;
+                        v.from = Math.min(Math.max(v.min, v.from + shift), v.span - range);
+                        v.to = v.from + range;
+                        dragX = e.offsetX;
+                        redraw();
+                        return;
+                    }
+                    if (v.res && e.offsetY >= v.chartTop && e.offsetX >= v.labelWidth) {
+                        var k = sampleAt(v.res, v.from + (e.offsetX - v.labelWidth) / v.scale);
+                        tooltip.textContent = formatMs(v.res.time[k]) + '  |  CPU ' + v.res.cpu[k] + '%  |  RSS ' +
+                            formatMb(v.res.rss[k]) + '  |  ' + v.res.threads[k] + ' threads  |  ' + v.res.fds[k] + ' fds';
+                        tooltip.style.left = (e.offsetX + 12) + 'px';
+                        tooltip.style.top = (e.offsetY + 12) + 'px';
+                        tooltip.style.display = 'block';
+                        return;
+                    }
+                    var i = timelineBarAt(e.offsetX, e.offsetY);
+                    if (i < 0) {
+                        tooltip.style.display = 'none';
+                        return;
+                    }
+                    tooltip.textContent = timelineData.suites[timelineData.suite[i]] + ' :: ' + timelineData.name[i] + '  |  ' +
+                        timelineData.statuses[timelineData.status[i]] + '  |  ' + formatMs(timelineData.duration[i]) +
+                        ' @ ' + formatMs(v.start[i]);
+                    tooltip.style.left = (e.offsetX + 12) + 'px';
+                    tooltip.style.top = (e.offsetY + 12) + 'px';
+                    tooltip.style.display = 'block';
+                });
+            }
         </script>
         <script>
             function alignTotalCount() {
@@ -1274,31 +1998,28 @@ def html_template():
         </script>
         
         <script>
-            for(var i=0; i<=__archive_count__; i++) {
-                var MeSeContext = document.getElementById("archive-chart-"+i).getContext("2d");
-                var archives = __archives__;
-                var pass = archives[i].pass;
-                var fail = archives[i].fail;
-                var skip = archives[i].skip;
-                var xpass = archives[i].xpass;
-                var xfail = archives[i].xfail;
-                var error = archives[i].error;
-                var total = archives[i].total;
-                
-                archiveTotalCase(total, i)
-                
+            var archives = __archives__;
+            var archiveCharts = {};
+
+            // charts of archived builds only exist while their panel is on screen, so opening the report costs
+            // the same however long the history is
+            function showArchiveChart(i) {
+                if (archiveCharts[i] || !archives[i]) return;
+                var build = archives[i];
+                archiveTotalCase(build.total, i);
+
                 var MeSeData = {
                     labels: ["PASS", "FAIL", "SKIP", "XPASS", "XFAIL", "ERROR"],
                     datasets: [{
                         label: "Test",
-                        data: [pass, fail, skip, xpass, xfail, error],
+                        data: [build.pass, build.fail, build.skip, build.xpass, build.xfail, build.error],
                         backgroundColor: ["#98cc64", "#fc6766", '#ffd050', '#aaaaaa', '#d35fbf', '#b13635'],
                         hoverBackgroundColor: ["#84b356", "#e35857", "#e4b942", "#bdbbbb", "#c357b0", '#8b2828'],
                         hoverBorderColor: ["#9bca6d", "#fd8a89", "#ffcf4c", "#abaaaa", "#f26fdb", "#b13635"]
                     }]
                 };
-                
-                var MeSeChart = new Chart(MeSeContext, {
+
+                archiveCharts[i] = new Chart(document.getElementById("archive-chart-" + i).getContext("2d"), {
                     type: 'horizontalBar',
                     data: MeSeData,
                     options: {
@@ -1330,6 +2051,38 @@ def html_template():
                     }
                 });
             }
+
+            function hideArchiveChart(i) {
+                if (!archiveCharts[i]) return;
+                archiveCharts[i].destroy();
+                delete archiveCharts[i];
+            }
+
+            function archiveIndex(canvas) {
+                return Number(canvas.id.substring("archive-chart-".length));
+            }
+
+            (function () {
+                var canvases = document.querySelectorAll('canvas[id^="archive-chart-"]');
+                if (!('IntersectionObserver' in window)) {
+                    for (var c = 0; c < canvases.length; c++) showArchiveChart(archiveIndex(canvases[c]));
+                    return;
+                }
+
+                var observer = new IntersectionObserver(function (entries) {
+                    entries.forEach(function (entry) {
+                        var i = archiveIndex(entry.target);
+                        if (entry.isIntersecting) showArchiveChart(i); else hideArchiveChart(i);
+                    });
+                }, {rootMargin: '200px 0px'});
+                for (var c = 0; c < canvases.length; c++) observer.observe(canvases[c]);
+
+                // a build picked in the list is drawn right away, before the scroll reaches it
+                $('#list-example').on('click', 'a[href^="#list-item-"]', function () {
+                    var canvas = $($(this).attr('href')).find('canvas[id^="archive-chart-"]')[0];
+                    if (canvas) showArchiveChart(archiveIndex(canvas));
+                });
+            })();
         </script>
         
         <script>
@@ -1508,3 +2261,276 @@ def html_template():
         
     </body>
 	"""
+
+
+def live_template():
+    return """
+	<!DOCTYPE doctype html>
+    <html lang="en">
+        <head>
+            <link href="https://i.imgur.com/UwGDzXn.png" rel="shortcut icon" type="image/x-icon" />
+            <title>__title__ (live)</title>
+            <meta charset="utf-8" />
+            <meta content="width=device-width, initial-scale=1" name="viewport" />
+            <script src="https://cdn.jsdelivr.net/npm/chart.js@2.8.0" type="text/javascript"></script>
+            <style>
+                body {
+                    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+                    background-color: #f4f4f4;
+                    color: #333333;
+                    margin: 0;
+                    padding: 20px 40px;
+                }
+                
+                .live-header {
+                    display: flex;
+                    align-items: baseline;
+                    justify-content: space-between;
+                }
+                
+                .live-state {
+                    font-size: 0.9rem;
+                    color: dimgrey;
+                }
+                
+                .live-summary {
+                    display: flex;
+                    align-items: center;
+                    margin: 10px 0 20px 0;
+                }
+                
+                .live-chart {
+                    width: 160px;
+                    height: 160px;
+                    margin-right: 20px;
+                }
+                
+                .live-counters {
+                    display: flex;
+                    flex-wrap: wrap;
+                }
+                
+                .live-counter {
+                    background-color: white;
+                    min-width: 110px;
+                    margin: 0 10px 10px 0;
+                    padding: 10px 15px;
+                    border-top: 4px solid #555555;
+                }
+                
+                .live-counter b {
+                    display: block;
+                    font-size: 1.6rem;
+                }
+                
+                .live-counter.PASS { border-color: #98cc64; }
+                .live-counter.FAIL { border-color: #fc6766; }
+                .live-counter.SKIP { border-color: #ffd050; }
+                .live-counter.xPASS { border-color: #aaaaaa; }
+                .live-counter.xFAIL { border-color: #d35fbf; }
+                .live-counter.ERROR { border-color: #b13635; }
+                
+                table {
+                    width: 100%;
+                    border-collapse: collapse;
+                    background-color: white;
+                    font-size: 0.85rem;
+                    margin-bottom: 25px;
+                }
+                
+                th, td {
+                    text-align: left;
+                    padding: 6px 10px;
+                    border-bottom: 1px solid #eeeeee;
+                    word-break: break-word;
+                }
+                
+                td.status-FAIL, td.status-ERROR { color: #fc6766; font-weight: bold; }
+                td.status-PASS { color: #6ea33a; }
+                td.status-SKIP { color: #c79a00; }
+                
+                pre {
+                    margin: 0;
+                    white-space: pre-wrap;
+                }
+            </style>
+        </head>
+        <body>
+            <div class="live-header">
+                <h3>__title__</h3>
+                <span class="live-state" id="live-state">waiting for results...</span>
+            </div>
+            <div class="live-summary">
+                <div class="live-chart"><canvas id="live-chart"></canvas></div>
+                <div class="live-counters" id="live-counters"></div>
+            </div>
+            <h5>Failures</h5>
+            <table>
+                <thead><tr><th>Suite</th><th>Test Case</th><th>Status</th><th>Time (s)</th><th>Error Message</th></tr></thead>
+                <tbody id="live-failures"></tbody>
+            </table>
+            <h5>Latest results</h5>
+            <table>
+                <thead><tr><th>Suite</th><th>Test Case</th><th>Status</th><th>Time (s)</th></tr></thead>
+                <tbody id="live-latest"></tbody>
+            </table>
+            <script>
+                // results arrive either over Server-Sent Events when the page is served by --html-report-serve, or as
+                // numbered chunk_NNNNNN.js files listed by status.js, loaded as scripts so the page also works from
+                // file:// where fetch() is blocked
+                var TRANSPORT = '__live_transport__';
+                var STATUSES = ['PASS', 'FAIL', 'SKIP', 'xPASS', 'xFAIL', 'ERROR'];
+                var LATEST_ROWS = 200;
+                var POLL_MS = 3000;
+                var loaded = 0, wanted = 0, loading = false, done = false, chart = null;
+
+                function cell(row, text, cls) {
+                    var td = document.createElement('td');
+                    if (cls) td.className = cls;
+                    td.textContent = text;
+                    row.appendChild(td);
+                    return td;
+                }
+
+                // table is 'latest' or 'failures' to fill only one of them, both by default
+                function addRows(rows, table) {
+                    var latest = document.getElementById('live-latest'), failures = document.getElementById('live-failures');
+                    for (var i = 0; i < rows.length; i++) {
+                        var r = rows[i], tr = document.createElement('tr');
+                        cell(tr, r[0]);
+                        cell(tr, r[1]);
+                        cell(tr, r[2], 'status-' + r[2]);
+                        cell(tr, r[3]);
+                        if (table !== 'failures') latest.insertBefore(tr, latest.firstChild);
+                        if (table !== 'latest' && (r[2] === 'FAIL' || r[2] === 'ERROR')) {
+                            var ftr = tr.cloneNode(true), pre = document.createElement('pre');
+                            pre.textContent = r[4];
+                            cell(ftr, '').appendChild(pre);
+                            failures.appendChild(ftr);
+                        }
+                    }
+                    while (latest.rows.length > LATEST_ROWS) latest.removeChild(latest.lastChild);
+                }
+
+                function clearRows() {
+                    document.getElementById('live-latest').innerHTML = '';
+                    document.getElementById('live-failures').innerHTML = '';
+                }
+
+                function showCounts(counts, total) {
+                    var html = '<div class="live-counter">TOTAL<b>' + total + '</b></div>';
+                    for (var i = 0; i < STATUSES.length; i++) {
+                        var s = STATUSES[i];
+                        if (counts[s]) html += '<div class="live-counter ' + s + '">' + s + '<b>' + counts[s] + '</b></div>';
+                    }
+                    document.getElementById('live-counters').innerHTML = html;
+
+                    var data = STATUSES.map(function (s) { return counts[s] || 0; });
+                    if (typeof Chart === 'undefined') return;
+                    if (chart === null) {
+                        chart = new Chart(document.getElementById('live-chart'), {
+                            type: 'doughnut',
+                            data: {
+                                labels: STATUSES,
+                                datasets: [{data: data, backgroundColor: ['#98cc64', '#fc6766', '#ffd050', '#aaaaaa', '#d35fbf', '#b13635']}]
+                            },
+                            options: {legend: {display: false}, cutoutPercentage: 70, animation: {duration: 0}}
+                        });
+                    } else {
+                        chart.data.datasets[0].data = data;
+                        chart.update();
+                    }
+                }
+
+                function showState(status) {
+                    var state = document.getElementById('live-state');
+                    done = status.done;
+                    if (status.rendering) {
+                        // --html-report-async: a detached process writes the report after pytest exits
+                        state.textContent = 'tests finished, writing the report in the background';
+                        if (status.report) {
+                            var target = document.createElement('a');
+                            target.href = status.report;
+                            state.appendChild(document.createTextNode(' to ' + decodeURI(target.pathname)));
+                        }
+                    } else if (done && status.report) {
+                        // the dashboard links a file:// URL, it stops serving when pytest exits
+                        var link = document.createElement('a');
+                        link.href = status.report;
+                        link.textContent = 'open the full report';
+                        state.textContent = 'finished, ';
+                        state.appendChild(link);
+                        if (link.protocol === 'file:') {
+                            state.appendChild(document.createTextNode(' (' + decodeURI(link.pathname) + ')'));
+                        }
+                    } else if (done) {
+                        state.textContent = 'finished';
+                    } else {
+                        state.textContent = 'running, updated ' + new Date(status.updated * 1000).toLocaleTimeString();
+                    }
+                }
+
+                function loadScript(src, id) {
+                    var old = id && document.getElementById(id);
+                    if (old) old.parentNode.removeChild(old);
+                    var script = document.createElement('script');
+                    if (id) script.id = id;
+                    script.src = src;
+                    script.onerror = function () { loading = false; };
+                    document.body.appendChild(script);
+                }
+
+                function loadNextChunk() {
+                    if (loading || loaded >= wanted) return;
+                    loading = true;
+                    loadScript('chunk_' + ('00000' + (loaded + 1)).slice(-6) + '.js');
+                }
+
+                function liveChunk(number, rows) {
+                    loading = false;
+                    if (number !== loaded + 1) return;
+                    loaded = number;
+                    addRows(rows);
+                    loadNextChunk();
+                }
+
+                function liveStatus(status) {
+                    showCounts(status.counts, status.total);
+                    showState(status);
+                    wanted = status.chunks;
+                    loadNextChunk();
+                }
+
+                function poll() {
+                    loadScript('status.js?' + Date.now(), 'live-status-script');
+                    if (!done) setTimeout(poll, POLL_MS);
+                }
+
+                function stream() {
+                    var source = new EventSource('events');
+                    // sent on every (re)connect, so a client that fell behind starts over from a consistent state
+                    source.addEventListener('snapshot', function (e) {
+                        var snapshot = JSON.parse(e.data);
+                        clearRows();
+                        addRows(snapshot.failures, 'failures');
+                        addRows(snapshot.latest, 'latest');
+                        showCounts(snapshot.status.counts, snapshot.status.total);
+                        showState(snapshot.status);
+                    });
+                    source.addEventListener('result', function (e) {
+                        var result = JSON.parse(e.data);
+                        addRows([result.row]);
+                        showCounts(result.counts, result.total);
+                        showState({done: false, updated: result.updated});
+                    });
+                    source.addEventListener('done', function (e) {
+                        showState(JSON.parse(e.data));
+                        source.close();
+                    });
+                }
+
+                if (TRANSPORT === 'sse' && window.EventSource) stream(); else poll();
+            </script>
+        </body>
+    </html>
+    """
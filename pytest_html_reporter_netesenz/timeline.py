@@ -0,0 +1,63 @@
+import json
+
+STATUSES = ['PASS', 'FAIL', 'SKIP', 'xPASS', 'xFAIL', 'ERROR']
+
+
+def encode_timeline(entries):
+    """Column-oriented, delta-encoded timeline of (start, stop, worker, status, suite, test) entries.
+
+    Times are integer milliseconds since the first test started; starts are sorted and stored as deltas so that
+    long sessions still encode to small integers.
+    """
+    entries = sorted(entries, key=lambda entry: entry[0])
+    origin = entries[0][0] if entries else 0
+
+    workers, suites = [], []
+    worker_index, suite_index = {}, {}
+    starts, durations, worker_ids, status_ids, suite_ids, names = [], [], [], [], [], []
+
+    previous = 0
+    for start, stop, worker, status, suite, test in entries:
+        start_ms = int(round((start - origin) * 1000))
+        starts.append(start_ms - previous)
+        previous = start_ms
+        durations.append(max(0, int(round((stop - start) * 1000))))
+
+        if worker not in worker_index:
+            worker_index[worker] = len(workers)
+            workers.append(worker)
+        worker_ids.append(worker_index[worker])
+
+        if suite not in suite_index:
+            suite_index[suite] = len(suites)
+            suites.append(suite)
+        suite_ids.append(suite_index[suite])
+
+        status_ids.append(STATUSES.index(status) if status in STATUSES else 0)
+        names.append(test)
+
+    return {
+        'origin': origin,
+        'workers': workers,
+        'suites': suites,
+        'statuses': STATUSES,
+        'start': starts,
+        'duration': durations,
+        'worker': worker_ids,
+        'status': status_ids,
+        'suite': suite_ids,
+        'name': names,
+    }
+
+
+def decode_starts(deltas):
+    starts, total = [], 0
+    for delta in deltas:
+        total += delta
+        starts.append(total)
+    return starts
+
+
+def script_json(data):
+    """Compact JSON that is safe to embed inside a <script> block."""
+    return json.dumps(data, separators=(',', ':')).replace('</', '<\\/')
@@ -0,0 +1,68 @@
+import argparse
+import random
+
+import pytest
+
+from pytest_html_reporter_netesenz.analytics import DurationAnalytics, DurationSketch, SlowestTests
+from pytest_html_reporter_netesenz.plugin import positive_int
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.expovariate(10) for _ in range(20000)]
+    sketch = DurationSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        expected = values[int(q * len(values)) - 1]
+        assert abs(sketch.quantile(q) - expected) <= expected * 0.02
+
+    assert sketch.count == 20000
+    assert sketch.max == values[-1]
+
+
+def test_sketch_small_and_zero_values():
+    sketch = DurationSketch()
+    assert sketch.quantile(0.5) == 0.0
+
+    for value in (0, 0, 0.5, 1.0):
+        sketch.add(value)
+
+    assert sketch.quantile(0.5) == 0.0
+    assert abs(sketch.quantile(0.99) - 1.0) < 0.02
+
+
+def test_slowest_tests_is_bounded():
+    slowest = SlowestTests(size=3)
+    for i in range(100):
+        slowest.add(i / 10, 'test_%d' % i)
+
+    assert [entry for _, entry in slowest.items()] == ['test_99', 'test_98', 'test_97']
+
+
+def test_analytics_summary():
+    analytics = DurationAnalytics(top_n=2)
+    analytics.add('test_a.py', 'test_1', 0.1, 'PASS')
+    analytics.add('test_a.py', 'test_2', 0.3, 'FAIL')
+    analytics.add('test_b.py', 'test_3', 0.2, 'PASS')
+
+    summary = analytics.summary()
+    assert list(summary['suites']) == ['test_a.py', 'test_b.py']
+    assert summary['suites']['test_a.py']['count'] == 2
+    assert [test['test_name'] for test in summary['slowest']] == ['test_2', 'test_3']
+    assert summary['overall']['count'] == 3
+
+
+def test_slowest_tests_of_size_zero_keeps_nothing():
+    slowest = SlowestTests(0)
+    slowest.add(1.0, 'test_a')
+    assert slowest.items() == []
+
+
+def test_slowest_option_rejects_sizes_below_one():
+    assert positive_int('1') == 1
+    for value in ('0', '-3'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_int(value)
@@ -0,0 +1,39 @@
+from pytest_html_reporter_netesenz.baselines import DurationBaselines
+
+
+def test_update_tracks_ewma_mean():
+    baselines = DurationBaselines(alpha=0.5)
+    for duration in (1.0, 2.0, 2.0):
+        baselines.update('test_a.py::test_1', duration)
+
+    mean, variance, samples = baselines.baselines['test_a.py::test_1']
+    assert mean == 1.75
+    assert variance > 0
+    assert samples == 3
+
+
+def test_check_flags_only_real_slowdowns():
+    baselines = DurationBaselines()
+    for duration in (1.0, 1.02, 0.98, 1.01):
+        baselines.update('test_a.py::test_1', duration)
+
+    assert baselines.check('test_a.py::test_1', 1.03, 3) is None
+    assert baselines.check('test_a.py::test_1', 2.0, 3)[2] > 3
+    assert baselines.check('test_a.py::test_unknown', 2.0, 3) is None
+
+
+def test_check_needs_enough_samples():
+    baselines = DurationBaselines()
+    baselines.update('test_a.py::test_1', 0.1)
+
+    assert baselines.check('test_a.py::test_1', 10.0, 3) is None
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'duration_baselines.json')
+    baselines = DurationBaselines()
+    baselines.update('test_a.py::test_1', 0.5)
+    baselines.save(path)
+
+    assert DurationBaselines.load(path).baselines == {'test_a.py::test_1': [0.5, 0.0, 1]}
+    assert DurationBaselines.load(str(tmp_path / 'missing.json')).baselines == {}
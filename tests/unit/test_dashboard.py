@@ -0,0 +1,56 @@
+from urllib.request import urlopen
+
+from pytest_html_reporter_netesenz.dashboard import Broadcaster, DashboardServer
+
+
+def test_broadcaster_snapshot_and_results():
+    broadcaster = Broadcaster()
+    broadcaster.publish(['test_a.py', 'test_1', 'FAIL', 0.1, 'E   assert 0'])
+    client = broadcaster.subscribe()
+    broadcaster.publish(['test_a.py', 'test_2', 'PASS', 0.2, ''])
+
+    event, snapshot = client.get_nowait()
+    assert event == 'snapshot'
+    assert snapshot['status']['counts'] == {'FAIL': 1}
+    assert [row[1] for row in snapshot['failures']] == ['test_1']
+
+    event, result = client.get_nowait()
+    assert event == 'result'
+    assert result['row'][1] == 'test_2' and result['counts'] == {'FAIL': 1, 'PASS': 1} and result['total'] == 2
+
+
+def test_broadcaster_finish_while_the_report_is_being_written():
+    broadcaster = Broadcaster()
+    broadcaster.finish('file:///report/pytest_html_report.html', rendering=True)
+
+    status = broadcaster.status()
+    assert status['done'] and status['rendering'] and status['report'] == 'file:///report/pytest_html_report.html'
+
+
+def test_slow_client_is_dropped_without_blocking():
+    broadcaster = Broadcaster(queue_size=3)
+    client = broadcaster.subscribe()
+    for i in range(10):
+        broadcaster.publish(['test_a.py', 'test_%d' % i, 'PASS', 0.0, ''])
+
+    assert client not in broadcaster.clients
+    messages = [client.get_nowait() for _ in range(client.qsize())]
+    assert messages[-1] is None
+
+
+def test_dashboard_server_streams_events(tmp_path):
+    server = DashboardServer(str(tmp_path), 'Nightly', port=0)
+    server.start()
+    try:
+        assert b'Nightly' in urlopen(server.url, timeout=5).read()
+
+        server.publish('test_a.py', 'test_1', 'PASS', 0.5, '')
+        server.finish('file:///report/pytest_html_report.html')
+        body = urlopen(server.url + 'events', timeout=5).read().decode()
+    finally:
+        server.stop()
+
+    assert server.url.startswith('http://127.0.0.1:')
+    assert body.startswith('event: snapshot\n')
+    assert ('event: done\ndata: {"done": true, "report": "file:///report/pytest_html_report.html", '
+            '"rendering": false}') in body
@@ -0,0 +1,61 @@
+import pytest
+
+from pytest_html_reporter_netesenz.eventlog import EventLog, read_events
+from pytest_html_reporter_netesenz.recovery import ReplayReport, recover
+
+
+class Report(object):
+    def __init__(self, when, outcome, longreprtext=''):
+        self.nodeid = 'test_a.py::test_1'
+        self.when = when
+        self.outcome = outcome
+        self.passed = outcome == 'passed'
+        self.duration = 0.5
+        self.longreprtext = longreprtext
+
+
+def test_event_log_round_trip(tmp_path):
+    path = str(tmp_path / 'events.ndjson')
+    log = EventLog(path, flush_interval=0.01)
+    log.session(100.0, {'title': 'T'}, None)
+    log.report(Report('setup', 'passed'), 'test_1', 100.0, 100.5)
+    log.report(Report('call', 'failed', 'E   assert 0'), 'test_1', 100.5, 101.0)
+    log.close()
+
+    events = read_events(path)
+    assert [event['event'] for event in events] == ['session', 'report', 'report', 'finish']
+    assert 'longrepr' not in events[1]
+    assert events[2]['longrepr'] == 'E   assert 0'
+
+    rep = ReplayReport.from_event(events[2])
+    assert rep.failed and rep.when == 'call' and rep.longreprtext == 'E   assert 0'
+    assert not hasattr(rep, 'wasxfail')
+
+
+def test_read_events_stops_at_truncated_line(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    path.write_bytes(b'{"event":"session","start":1}\n{"event":"report","nodeid":"te')
+
+    assert read_events(str(path)) == [{'event': 'session', 'start': 1}]
+
+
+def test_new_log_keeps_the_previous_one(tmp_path):
+    path = str(tmp_path / 'events.ndjson')
+    for start in (100.0, 200.0):
+        log = EventLog(path, flush_interval=0.01)
+        log.session(start, {}, None)
+        log.close()
+
+    assert read_events(path)[0]['start'] == 200.0
+    assert read_events(path + '.1')[0]['start'] == 100.0
+
+
+def test_recover_refuses_a_session_that_wrote_its_report(tmp_path):
+    path = str(tmp_path / 'events.ndjson')
+    log = EventLog(path, flush_interval=0.01)
+    log.session(100.0, {}, None)
+    log.close(reported=True)
+
+    assert read_events(path)[-1]['reported'] is True
+    with pytest.raises(ValueError, match='already wrote its report'):
+        recover(path)
@@ -0,0 +1,56 @@
+import json
+import os
+
+from pytest_html_reporter_netesenz.live import LiveReport, finish_rendered
+
+
+def read_call(path, name):
+    with open(path) as f:
+        text = f.read()
+    assert text.startswith(name + '(')
+    return text[len(name) + 1:text.rindex(')')]
+
+
+def test_live_report_writes_only_new_results(tmp_path):
+    directory = str(tmp_path / 'live')
+    live = LiveReport(directory, 'Nightly', interval=3600, batch=2)
+    assert os.path.isfile(os.path.join(directory, 'live.html'))
+
+    live.add('test_a.py', 'test_1', 'PASS', 0.1234, '')
+    assert live.chunks == 0
+    live.add('test_a.py', 'test_2', 'FAIL', 1.0, 'E   </script>')
+    live.add('test_b.py', 'test_3', 'PASS', 0.5, '')
+    live.flush(done=True, report='../pytest_html_report.html')
+
+    assert sorted(os.listdir(directory)) == ['chunk_000001.js', 'chunk_000002.js', 'live.html', 'status.js']
+    first = read_call(os.path.join(directory, 'chunk_000001.js'), 'liveChunk')
+    assert '</script>' not in first
+    assert json.loads(first.split(', ', 1)[1])[0] == ['test_a.py', 'test_1', 'PASS', 0.123, '']
+
+    status = json.loads(read_call(os.path.join(directory, 'status.js'), 'liveStatus'))
+    assert status['counts'] == {'PASS': 2, 'FAIL': 1}
+    assert status['total'] == 3 and status['chunks'] == 2 and status['done']
+
+
+def test_live_report_clears_chunks_of_previous_session(tmp_path):
+    directory = str(tmp_path / 'live')
+    live = LiveReport(directory, 'Nightly', batch=1)
+    live.add('test_a.py', 'test_1', 'PASS', 0.1, '')
+
+    LiveReport(directory, 'Nightly')
+    assert 'chunk_000001.js' not in os.listdir(directory)
+
+
+def test_live_report_waits_for_a_detached_renderer(tmp_path):
+    directory = str(tmp_path / 'live')
+    live = LiveReport(directory, 'Nightly', interval=3600)
+    live.add('test_a.py', 'test_1', 'PASS', 0.1, '')
+    live.flush(rendering=True)
+
+    status = json.loads(read_call(os.path.join(directory, 'status.js'), 'liveStatus'))
+    assert status['rendering'] and not status['done'] and status['report'] is None
+
+    finish_rendered(directory, live.status(), '../pytest_html_report.html')
+    status = json.loads(read_call(os.path.join(directory, 'status.js'), 'liveStatus'))
+    assert status['done'] and not status['rendering'] and status['report'] == '../pytest_html_report.html'
+    assert status['counts'] == {'PASS': 1} and status['chunks'] == 1
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+from pytest_html_reporter_netesenz.locking import LOCK_FILE, report_lock
+
+
+def test_report_lock_serialises_writers(tmp_path):
+    order = []
+
+    def writer(name):
+        with report_lock(str(tmp_path), poll=0.01):
+            order.append(name + ':start')
+            time.sleep(0.05)
+            order.append(name + ':end')
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [entry.split(':')[1] for entry in order] == ['start', 'end', 'start', 'end']
+    assert not os.path.exists(str(tmp_path / LOCK_FILE))
+
+
+def test_report_lock_takes_over_from_dead_owner(tmp_path):
+    # pids are never this large, the owner cannot be alive
+    (tmp_path / LOCK_FILE).write_text('999999999')
+
+    with report_lock(str(tmp_path), timeout=5, poll=0.01):
+        assert (tmp_path / LOCK_FILE).read_text() == str(os.getpid())
+
+
+def test_report_lock_takes_over_from_stuck_owner(tmp_path):
+    path = str(tmp_path / LOCK_FILE)
+    order = []
+    held = threading.Event()
+
+    def stuck_owner():
+        with report_lock(str(tmp_path)):
+            # last written an hour ago, as if the owner hung since
+            os.utime(path, (time.time() - 3600, time.time() - 3600))
+            held.set()
+            time.sleep(0.5)
+            order.append('stuck:end')
+
+    def waiter(name):
+        with report_lock(str(tmp_path), timeout=60, poll=0.01):
+            order.append(name + ':start')
+            time.sleep(0.05)
+            order.append(name + ':end')
+
+    owner = threading.Thread(target=stuck_owner)
+    owner.start()
+    held.wait()
+    waiters = [threading.Thread(target=waiter, args=(name,)) for name in ('a', 'b')]
+    for thread in waiters:
+        thread.start()
+    for thread in waiters + [owner]:
+        thread.join()
+
+    # the waiters did not wait for the stuck owner, and still took turns between themselves
+    assert order[-1] == 'stuck:end'
+    assert [entry.split(':')[1] for entry in order[:-1]] == ['start', 'end', 'start', 'end']
+    assert not os.path.exists(path)
+
+
+def test_report_lock_waits_for_a_live_owner_past_timeout(tmp_path):
+    order = []
+    held = threading.Event()
+
+    def owner():
+        with report_lock(str(tmp_path)):
+            held.set()
+            time.sleep(0.3)
+            order.append('owner:end')
+
+    thread = threading.Thread(target=owner)
+    thread.start()
+    held.wait()
+    # the timeout is about the age of the lock, not how long this waiter has been waiting
+    with report_lock(str(tmp_path), timeout=0.5, poll=0.01):
+        order.append('waiter:start')
+    thread.join()
+
+    assert order == ['owner:end', 'waiter:start']
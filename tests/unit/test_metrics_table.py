@@ -0,0 +1,108 @@
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from pytest_html_reporter_netesenz.metrics_table import MetricsTable
+from pytest_html_reporter_netesenz.template import html_template
+
+# feeds the messages to the report's worker and prints its answers
+WORKER_DRIVER = """
+var input = JSON.parse(require('fs').readFileSync(0, 'utf8')), answers = [];
+self.postMessage = function (message) { answers.push(message.result); };
+self.onmessage({data: {type: 'load', text: input.text}});
+input.messages.forEach(function (message, id) {
+    message.id = id;
+    self.onmessage({data: message});
+});
+process.stdout.write(JSON.stringify(answers));
+"""
+
+
+def run_worker(table, messages):
+    node = shutil.which('node')
+    if node is None: pytest.skip('node is not installed')
+    source = re.search(r'<script type="text/js-worker" id="test-metrics-worker">(.*?)</script>', html_template(),
+                       re.S).group(1)
+    driver = subprocess.run([node, '-e', 'var self = {};\n' + source + WORKER_DRIVER], check=True,
+                            input=json.dumps({'text': json.dumps(table.encode()), 'messages': messages}),
+                            stdout=subprocess.PIPE, universal_newlines=True)
+    return json.loads(driver.stdout)
+
+
+def query(search='', column=3, direction='desc'):
+    return {'type': 'query', 'request': {'draw': 1, 'start': 0, 'length': -1, 'search': search,
+                                         'order': {'column': column, 'dir': direction}}}
+
+
+def test_strings_are_interned():
+    table = MetricsTable()
+    table.add('suite_a', 'test_one', 'FAIL', 1.234, 0.1, 1.0, 0.134, 'boom')
+    table.add('suite_a', 'test_two', 'FAIL', 0.5, 0.0, 0.5, 0.0, 'boom')
+
+    data = table.encode()
+    assert data['strings'] == ['suite_a', 'test_one', 'FAIL', 'boom', 'test_two']
+    assert data['suite'] == [0, 0]
+    assert data['message'] == [3, 3]
+    assert data['duration'] == [1.23, 0.5]
+    assert len(table) == 2
+
+
+def test_worker_decodes_rows_with_resource_columns():
+    table = MetricsTable()
+    table.add('s', 't1', 'PASS', 1, 0.25, 0.5, 0.25, '', [0.1, 2.5])
+    table.add('s', 't2', 'SKIP', 0, 0, 0, 0, 'skipped', [0.0, None])
+
+    page = run_worker(table, [query()])[0]
+    assert page['recordsTotal'] == page['recordsFiltered'] == 2
+    assert page['counts'] == {'PASS': 1, 'SKIP': 1}
+    # the row id and whether the message was cut short are appended for the table
+    assert page['data'] == [['s', 't1', 'PASS', 1, 0.25, 0.5, 0.25, 0.1, 2.5, '', 0, False],
+                            ['s', 't2', 'SKIP', 0, 0, 0, 0, 0.0, None, 'skipped', 1, False]]
+
+
+def test_worker_sorts_null_resource_values_first():
+    table = MetricsTable()
+    for name, peak in (('t1', 3.0), ('t2', None), ('t3', 1.0)):
+        table.add('s', name, 'PASS', 0, 0, 0, 0, '', [0.0, peak])
+
+    ascending, descending = run_worker(table, [query(column=8, direction='asc'), query(column=8)])
+    assert [row[1] for row in ascending['data']] == ['t2', 't3', 't1']
+    assert [row[1] for row in descending['data']] == ['t1', 't3', 't2']
+
+
+def test_worker_search_matches_words_inside_tokens():
+    table = MetricsTable()
+    table.add('tests/test_login.py', 'test_login_ok', 'PASS', 0, 0, 0, 0, '')
+    table.add('tests/test_login.py', 'test_login_locked', 'FAIL', 0, 0, 0, 0, 'AccountLocked: user42')
+    table.add('tests/test_cart.py', 'test_checkout', 'FAIL', 0, 0, 0, 0, 'AssertionError: Timeout after 30s')
+    table.add('tests/test_i18n.py', 'тест_вход', 'PASS', 0, 0, 0, 0, '')
+
+    index = table.encode()['index']
+    assert index['tokens'] == sorted(index['tokens'])
+
+    searches = ['login fail', 'TEST_LOG', 'locked user4', 'Error', 'fail nothing', 'вход', '  ']
+    pages = run_worker(table, [query(search, column=1, direction='asc') for search in searches])
+    assert [[row[1] for row in page['data']] for page in pages] == [
+        ['test_login_locked'],
+        ['test_login_locked', 'test_login_ok'],
+        ['test_login_locked'],
+        ['test_checkout'],
+        [],
+        ['тест_вход'],
+        ['test_checkout', 'test_login_locked', 'test_login_ok', 'тест_вход'],
+    ]
+
+
+def test_worker_exports_and_returns_full_messages():
+    table = MetricsTable()
+    table.add('s', 't1', 'FAIL', 0, 0, 0, 0, 'E' * 80)
+    table.add('s', 't2', 'PASS', 0, 0, 0, 0, '')
+
+    page, export, message = run_worker(table, [query('fail'), {'type': 'export', 'columns': [1, 7]},
+                                               {'type': 'message', 'row': 0}])
+    assert page['data'][0][7:] == ['E' * 50, 0, True]
+    assert export == [['t1', 'E' * 80]]
+    assert message == 'E' * 80
@@ -0,0 +1,37 @@
+from pytest_html_reporter_netesenz.analytics import DurationAnalytics, DurationHistogram
+from pytest_html_reporter_netesenz.openmetrics import render_metrics, write_metrics
+
+
+def test_histogram_is_cumulative():
+    histogram = DurationHistogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.add(value)
+
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), ('+Inf', 4)]
+
+
+def test_render_metrics(tmp_path):
+    analytics = DurationAnalytics()
+    analytics.add('test_"a".py', 'test_1', 0.2, 'PASS')
+    analytics.add('test_"a".py', 'test_2', 2.0, 'FAIL')
+    json_data = {
+        'status': 'FAIL', 'start_time': 1700000000.5,
+        'status_list': {'pass': '1', 'fail': '1', 'skip': '0', 'error': '0', 'xpass': '0', 'xfail': '0', 'rerun': '2'},
+        'content': {'suites': {0: {'suite_name': 'test_"a".py', 'status': {'total_pass': 1, 'total_fail': 1}}}},
+    }
+
+    text = render_metrics(json_data, analytics, 0.25)
+
+    assert 'pytest_tests{status="fail"} 1\n' in text
+    assert 'pytest_reruns 2\n' in text
+    assert 'pytest_suite_tests{status="pass",suite="test_\\"a\\".py"} 1\n' in text
+    assert 'pytest_test_duration_seconds_bucket{le="+Inf",suite="test_\\"a\\".py"} 2\n' in text
+    assert 'pytest_test_duration_seconds_sum{suite="test_\\"a\\".py"} 2.2\n' in text
+    assert 'pytest_run_status 0\n' in text
+    assert 'pytest_report_generation_seconds 0.25\n' in text
+    assert text.endswith('# EOF\n')
+
+    path = tmp_path / 'metrics' / 'pytest.prom'
+    write_metrics(str(path), text)
+    assert path.read_text() == text
+    assert [p.name for p in path.parent.iterdir()] == ['pytest.prom']
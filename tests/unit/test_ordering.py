@@ -0,0 +1,87 @@
+from pytest_html_reporter_netesenz.history import failure_history
+from pytest_html_reporter_netesenz.ordering import failure_rank, reorder
+
+pytest_plugins = 'pytester'
+
+
+def build(start, statuses):
+    tests = dict((i, {'nodeid': nodeid, 'test_name': nodeid.split('::')[-1], 'status': status, 'rerun': '0'})
+                 for i, (nodeid, status) in enumerate(statuses.items()))
+    return {'start_time': start, 'content': {'suites': {0: {'suite_name': 'test_a.py', 'tests': tests}}}}
+
+
+def test_failure_history_marks_recent_and_flaky_tests():
+    builds = [build(i, {'a::stable': 'PASS', 'a::flaky': status, 'a::broken': 'FAIL' if i == 9 else 'PASS',
+                        'a::skipped': 'SKIP'})
+              for i, status in enumerate(['PASS', 'FAIL'] * 5)]
+    stats = failure_history(None, builds)
+
+    assert stats['a::stable'] == {'runs': 10, 'failures': 0, 'recent_failure': False, 'flaky': False}
+    assert stats['a::flaky']['flaky'] and stats['a::flaky']['failures'] == 5
+    assert stats['a::broken']['recent_failure'] and not stats['a::broken']['flaky']
+    assert stats['a::skipped'] == {'runs': 10, 'failures': 0, 'recent_failure': False, 'flaky': False}
+
+
+def test_failure_rank_prefers_cheap_likely_failures():
+    stats = {
+        'm.py::recent': {'runs': 10, 'failures': 1, 'recent_failure': True, 'flaky': False},
+        'm.py::cheap': {'runs': 10, 'failures': 1, 'recent_failure': False, 'flaky': False},
+        'm.py::slow': {'runs': 10, 'failures': 1, 'recent_failure': False, 'flaky': False},
+    }
+    rank = failure_rank(stats, {'m.py::recent': 60.0, 'm.py::cheap': 0.1, 'm.py::slow': 10.0})
+
+    assert sorted(stats, key=rank) == ['m.py::recent', 'm.py::cheap', 'm.py::slow']
+
+
+def test_reorder_keeps_modules_and_classes_together():
+    nodeids = ['a.py::test_1', 'a.py::C::test_2', 'a.py::C::test_3', 'a.py::test_4[x]', 'b.py::test_5']
+    rank = {'a.py::test_1': 5, 'a.py::C::test_2': 4, 'a.py::C::test_3': 1, 'a.py::test_4[x]': 3, 'b.py::test_5': 2}.get
+
+    assert reorder(nodeids, rank, nodeid=lambda nodeid: nodeid) == [
+        'a.py::C::test_3', 'a.py::C::test_2', 'a.py::test_4[x]', 'a.py::test_1', 'b.py::test_5']
+
+
+def test_reorder_keeps_packages_together():
+    nodeids = ['p/a.py::test_1', 'q/b.py::test_2', 'p/s/c.py::test_3']
+    rank = {'p/a.py::test_1': 5, 'q/b.py::test_2': 1, 'p/s/c.py::test_3': 0}.get
+
+    assert reorder(nodeids, rank, nodeid=lambda nodeid: nodeid) == [
+        'p/s/c.py::test_3', 'p/a.py::test_1', 'q/b.py::test_2']
+
+
+def test_reorder_sets_up_parametrized_module_fixture_once_per_param(pytester):
+    pytester.makeconftest("""
+        from pytest_html_reporter_netesenz.ordering import reorder
+
+        def pytest_collection_modifyitems(items):
+            # the worst case for fixture reuse: reverse the collection order
+            positions = dict((item.nodeid, i) for i, item in enumerate(items))
+            items[:] = reorder(items, lambda nodeid: -positions[nodeid])
+    """)
+    pytester.makepyfile("""
+        import pytest
+
+        setups = []
+
+        @pytest.fixture(scope='module', params=[1, 2])
+        def resource(request):
+            setups.append(request.param)
+            return request.param
+
+        def test_a(resource):
+            pass
+
+        class TestB(object):
+            def test_b(self, resource):
+                pass
+
+            def test_c(self, resource):
+                pass
+
+        def teardown_module():
+            with open('setups.txt', 'w') as setups_file:
+                setups_file.write(' '.join(str(param) for param in setups))
+    """)
+
+    pytester.runpytest('-p', 'no:reporter', '-p', 'no:cacheprovider').assert_outcomes(passed=6)
+    assert sorted(pytester.path.joinpath('setups.txt').read_text().split()) == ['1', '2']
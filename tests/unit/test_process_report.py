@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+# the plugin keeps a session's results in module globals, so every session is fed in a fresh interpreter
+SESSION_DRIVER = """
+import json, sys
+from pytest_html_reporter_netesenz import plugin
+from pytest_html_reporter_netesenz.recovery import ReplayConfig, ReplayReport
+
+options = plugin.option_defaults()
+options['path'] = sys.argv[1]
+reporter = plugin.HTMLReporter(options['path'], ReplayConfig(options))
+for nodeid, phases in json.loads(sys.argv[2]):
+    for when, outcome, duration, longrepr in phases:
+        reporter.process_report(ReplayReport(nodeid, when, outcome, duration, longrepr), nodeid.split('::')[-1],
+                                0.0, duration)
+reporter.pytest_sessionfinish(None)
+print(json.dumps({'tests': reporter.json_data['content']['suites'][0]['tests'],
+                  'table': plugin._test_metrics.encode()}))
+"""
+
+
+def run_session(tmp_path, tests):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.check_output([sys.executable, '-c', SESSION_DRIVER, str(tmp_path), json.dumps(tests)],
+                                     env=dict(os.environ, PYTHONPATH=root))
+    result = json.loads(output.decode())
+    return [result['tests'][str(i)] for i in range(len(result['tests']))], result['table']
+
+
+def test_phase_durations_are_stored_per_test(tmp_path):
+    tests, table = run_session(tmp_path, [
+        ['t.py::test_ok', [['setup', 'passed', 0.1, ''], ['call', 'passed', 0.2, ''], ['teardown', 'passed', 0.3, '']]],
+        ['t.py::test_fail', [['setup', 'passed', 0.01, ''], ['call', 'failed', 0.02, 'E   assert 0'],
+                             ['teardown', 'passed', 0.03, '']]],
+    ])
+
+    assert [test['status'] for test in tests] == ['PASS', 'FAIL']
+    assert [(test['setup_duration'], test['call_duration'], test['teardown_duration'], test['duration'])
+            for test in tests] == [(0.1, 0.2, 0.3, 0.6), (0.01, 0.02, 0.03, 0.06)]
+    assert (table['setup'], table['call'], table['teardown']) == ([0.1, 0.01], [0.2, 0.02], [0.3, 0.03])
+
+
+def test_teardown_and_setup_errors_are_one_row_each(tmp_path):
+    tests, table = run_session(tmp_path, [
+        ['t.py::test_teardown', [['setup', 'passed', 0.01, ''], ['call', 'passed', 0.02, ''],
+                                 ['teardown', 'failed', 0.03, 'E   RuntimeError: cleanup']]],
+        ['t.py::test_setup', [['setup', 'failed', 0.04, 'E   RuntimeError: fixture'],
+                              ['teardown', 'passed', 0.05, '']]],
+    ])
+
+    # a row is only written once the teardown report is in, so a teardown error replaces the passed call
+    assert [(test['test_name'], test['status']) for test in tests] == [('test_teardown', 'ERROR'),
+                                                                       ('test_setup', 'ERROR')]
+    assert 'cleanup' in tests[0]['message'] and 'fixture' in tests[1]['message']
+    assert (tests[1]['setup_duration'], tests[1]['call_duration'], tests[1]['teardown_duration']) == (0.04, 0, 0.05)
+    assert [table['strings'][status] for status in table['status']] == ['ERROR', 'ERROR']
+    assert table['teardown'] == [0.03, 0.05]
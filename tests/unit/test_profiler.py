@@ -0,0 +1,54 @@
+import time
+import tracemalloc
+
+from pytest_html_reporter_netesenz.profiler import PhaseProfiler, format_bytes
+
+
+def test_stage_records_duration_bytes_and_peak(tmp_path):
+    profiler = PhaseProfiler()
+    output = tmp_path / 'output.json'
+
+    with profiler.stage('generate_json_data', str(output)):
+        output.write_text('x' * 100)
+        data = [0] * 10000
+
+    stage = profiler.summary()['stages'][0]
+    assert stage['stage'] == 'generate_json_data'
+    assert stage['duration_ns'] > 0
+    assert stage['bytes_written'] == 100
+    assert stage['peak_memory'] >= 10000 * 8
+    assert len(data) == 10000
+
+
+def test_stage_leaves_existing_tracing_running():
+    tracemalloc.start()
+    try:
+        profiler = PhaseProfiler()
+        with profiler.stage('generate_json_data'):
+            data = [0] * 10000
+
+        assert tracemalloc.is_tracing()
+        assert profiler.summary()['stages'][0]['peak_memory'] >= 10000 * 8
+        assert len(data) == 10000
+    finally:
+        tracemalloc.stop()
+
+    with PhaseProfiler().stage('generate_json_data'):
+        pass
+    assert not tracemalloc.is_tracing()
+
+
+def test_hook_time():
+    profiler = PhaseProfiler()
+    profiler.add_hook_time(time.perf_counter_ns())
+    profiler.add_hook_time(time.perf_counter_ns())
+
+    summary = profiler.summary()
+    assert summary['hook_calls'] == 2
+    assert summary['hook_ns'] >= 0
+    assert profiler.lines()[-1].strip().startswith('per-test hooks')
+
+
+def test_format_bytes():
+    assert format_bytes(512) == '512.0 B'
+    assert format_bytes(2048) == '2.0 KB'
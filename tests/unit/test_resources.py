@@ -0,0 +1,33 @@
+import tracemalloc
+
+from pytest_html_reporter_netesenz.resources import ResourceMeter, current_rss
+
+
+def test_stop_reports_cpu_and_rss_deltas():
+    meter = ResourceMeter()
+    meter.start('test_a.py::test_1')
+    sum(i * i for i in range(200000))
+    cpu_time, rss_delta, memory_peak = meter.stop('test_a.py::test_1')
+
+    assert cpu_time > 0
+    assert isinstance(rss_delta, int)
+    assert memory_peak is None
+    assert meter.stop('test_a.py::test_1') is None
+
+
+def test_trace_memory_reports_allocation_peak():
+    meter = ResourceMeter(trace_memory=True)
+    tracemalloc.start()
+    try:
+        meter.start('test_a.py::test_1')
+        data = bytearray(4 * 1024 * 1024)
+        del data
+        memory_peak = meter.stop('test_a.py::test_1')[2]
+    finally:
+        tracemalloc.stop()
+
+    assert memory_peak >= 4 * 1024 * 1024
+
+
+def test_current_rss_is_non_negative():
+    assert current_rss() >= 0
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+import pytest
+
+from pytest_html_reporter_netesenz.plugin import positive_float
+from pytest_html_reporter_netesenz.sampler import ResourceSampler, downsample, read_process_stat
+
+
+def test_downsample_keeps_spikes_and_averages_cpu():
+    samples = [(float(i), 10.0, 100, 1, 3) for i in range(100)]
+    samples[42] = (42.0, 90.0, 500, 7, 9)
+
+    merged = downsample(samples, 10)
+
+    assert len(merged) == 10
+    assert merged[4][0] == 40.0
+    assert merged[4][1] == 18.0
+    assert merged[4][2:] == (500, 7, 9)
+    assert downsample(samples[:5], 10) == samples[:5]
+
+
+def test_sampler_records_until_stopped():
+    sampler = ResourceSampler(interval=0.01)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+
+    assert not sampler.is_alive()
+    summary = sampler.summary()
+    assert summary['time'][0] == 0
+    assert len(summary['cpu']) == len(summary['rss']) == len(summary['threads']) == len(summary['fds']) > 1
+    assert summary['threads'][0] >= 2
+
+
+def test_read_process_stat():
+    cpu, threads = read_process_stat()
+    assert cpu > 0 and threads >= 1
+
+
+def test_sampler_interval_option_rejects_non_positive_values():
+    assert positive_float('0.5') == 0.5
+    for value in ('0', '-1', 'nan'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_float(value)
@@ -0,0 +1,45 @@
+from io import BytesIO
+
+from PIL import Image
+
+from pytest_html_reporter_netesenz.screenshot_encoder import dhash, encode_screenshot, hash_distance, \
+    screenshot_extension
+
+
+def _image(width=400, height=200):
+    img = Image.new('RGB', (width, height), (200, 30, 30))
+    img.paste((20, 20, 220), (0, 0, width // 2, height // 2))
+    return img
+
+
+def _png(width=400, height=200):
+    data = BytesIO()
+    _image(width, height).save(data, 'PNG')
+    return data.getvalue()
+
+
+def test_png_is_stored_untouched(tmp_path):
+    data = _png()
+    dest = str(tmp_path / 'shot.png')
+
+    assert encode_screenshot(data, dest)[:2] == (len(data), len(data))
+    assert open(dest, 'rb').read() == data
+
+
+def test_encode_resizes_and_converts(tmp_path):
+    dest = str(tmp_path / ('shot.' + screenshot_extension('jpeg')))
+
+    encode_screenshot(_png(), dest, fmt='jpeg', quality=50, max_width=100, grayscale=True)
+
+    img = Image.open(dest)
+    assert img.format == 'JPEG'
+    assert img.size == (100, 50)
+    assert img.mode == 'L'
+
+
+def test_dhash():
+    img = _image()
+
+    assert len(dhash(img)) == 16
+    assert hash_distance(dhash(img), dhash(img.resize((200, 100)))) <= 2
+    assert hash_distance(dhash(img), dhash(img.transpose(Image.FLIP_LEFT_RIGHT))) > 10
@@ -0,0 +1,84 @@
+import argparse
+import os
+import glob
+from concurrent.futures import Future
+
+import pytest
+
+from pytest_html_reporter_netesenz import plugin
+from pytest_html_reporter_netesenz.plugin import clean_screenshots, remove_screenshot_dirs, screenshot_quality
+from pytest_html_reporter_netesenz.history import screenshot_hashes, write_screenshot_hashes
+from pytest_html_reporter_netesenz.recovery import ReplayConfig
+
+
+def test_clean_screenshots_moves_directory_aside(tmp_path):
+    screenshot_dir = tmp_path / 'pytest_screenshots'
+    screenshot_dir.mkdir()
+    (screenshot_dir / '1.png').write_bytes(b'png')
+
+    clean_screenshots(str(tmp_path))
+
+    assert not screenshot_dir.exists()
+
+
+def test_remove_screenshot_dirs(tmp_path):
+    trash_dir = tmp_path / 'pytest_screenshots.trash-1-1'
+    trash_dir.mkdir()
+    (trash_dir / '1.png').write_bytes(b'png')
+
+    remove_screenshot_dirs([str(trash_dir)])
+
+    assert glob.glob(str(tmp_path) + '/pytest_screenshots.trash-*') == []
+    assert not os.path.isdir(str(trash_dir))
+
+
+def test_screenshot_quality_range():
+    assert screenshot_quality('1') == 1
+    assert screenshot_quality('100') == 100
+    for value in ('0', '101', '-5'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            screenshot_quality(value)
+
+
+class _Terminal(object):
+    def __init__(self):
+        self.lines = []
+
+    def write_line(self, line):
+        self.lines.append(line)
+
+
+def test_failed_encode_keeps_original_screenshot(tmp_path, monkeypatch):
+    options = plugin.option_defaults()
+    options['path'] = str(tmp_path)
+    reporter = plugin.HTMLReporter(str(tmp_path), ReplayConfig(options))
+    monkeypatch.setattr(plugin, '_attach_screenshot_details', '')
+    os.makedirs(str(tmp_path / 'pytest_screenshots'))
+
+    job = Future()
+    job.set_exception(RuntimeError('worker died'))
+    reporter.screenshot_pool = plugin.ProcessPoolExecutor(1)
+    reporter.screenshot_jobs = [(job, {'name': '1_0.png', 'suite': 'suite', 'test': 'test', 'error': 'error',
+                                       'nodeid': 'test_a.py::test', 'index': (0, 0), 'base': str(tmp_path),
+                                       'data': b'raw'})]
+    terminal = _Terminal()
+
+    reporter.finish_screenshots(terminal)
+
+    assert (tmp_path / 'pytest_screenshots' / '1_0.png').read_bytes() == b'raw'
+    assert 'could not encode screenshot 1_0.png' in terminal.lines[0]
+
+
+def test_screenshot_hashes_come_from_the_previous_build(tmp_path):
+    assert screenshot_hashes(str(tmp_path)) == {}
+
+    build = {'content': {'suites': {'0': {'suite_name': 'test_a.py', 'tests': {
+        '0': {'nodeid': 'test_a.py::test_one', 'screenshot_hash': 'ff00ff00ff00ff00'},
+        '1': {'nodeid': 'test_a.py::test_two'},
+    }}}}}
+    write_screenshot_hashes(str(tmp_path), build)
+    assert screenshot_hashes(str(tmp_path)) == {'test_a.py::test_one': 'ff00ff00ff00ff00'}
+
+    # the next build replaces the index, a test without a screenshot this time has nothing to compare against
+    write_screenshot_hashes(str(tmp_path), {'content': {'suites': {}}})
+    assert screenshot_hashes(str(tmp_path)) == {}
@@ -0,0 +1,72 @@
+import argparse
+import json
+
+import pytest
+
+from pytest_html_reporter_netesenz.history import historical_durations
+from pytest_html_reporter_netesenz.sharding import load_shard_file, parse_shard, plan_shards, select_shard, \
+    shard_count, write_shard_file
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for value in ('0/4', '5/4', '2', 'a/b'):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_plan_shards_balances_loads():
+    durations = {'t%d' % i: d for i, d in enumerate([8, 7, 6, 5, 4, 3, 2, 1])}
+    assignment, loads = plan_shards(durations, 3)
+
+    assert sorted(set(assignment.values())) == [1, 2, 3]
+    assert sum(loads) == 36
+    # LPT stays within 4/3 of the optimal makespan (12 here)
+    assert max(loads) <= 16
+
+
+def test_select_shard_partitions_collection():
+    durations = {'a': 10.0, 'b': 1.0, 'c': 1.0}
+    nodeids = ['a', 'b', 'c', 'new_1', 'new_2']
+    shards = [select_shard(nodeids, k, 2, durations) for k in (1, 2)]
+
+    assert shards[0] == ['a']
+    assert sorted(shards[0] + shards[1]) == sorted(nodeids)
+
+
+def test_historical_durations_from_archive(tmp_path):
+    (tmp_path / 'archive').mkdir()
+    for start, duration in ((1, 1.0), (2, 3.0)):
+        build = {'start_time': start, 'content': {'suites': {'0': {'suite_name': 'test_a.py', 'tests': {
+            '0': {'test_name': 'test_1', 'nodeid': 'test_a.py::test_1', 'duration': duration},
+            '1': {'test_name': 'test_2', 'status': 'PASS'}}}}}}
+        (tmp_path / 'archive' / ('output_%d.json' % start)).write_text(json.dumps(build))
+
+    assert historical_durations(str(tmp_path)) == {'test_a.py::test_1': 2.0}
+
+
+def test_shard_file_round_trip(tmp_path):
+    path = str(tmp_path / 'shards.json')
+    loads = write_shard_file(path, {'a': 2.0, 'b': 1.0}, 2)
+
+    plan = load_shard_file(path)
+    assert loads == [2.0, 1.0]
+    assert plan['assignment'] == {'a': 1, 'b': 2}
+    assert plan['durations'] == {'a': 2.0, 'b': 1.0}
+
+
+def test_select_shard_follows_the_pinned_assignment():
+    durations = {'a': 10.0, 'b': 1.0, 'c': 1.0}
+    # a plan that differs from what packing the collection would give
+    assignment = {'a': 2, 'b': 1, 'c': 1}
+    nodeids = ['a', 'b', 'c', 'new_1']
+    shards = [select_shard(nodeids, k, 2, durations, assignment) for k in (1, 2)]
+
+    assert shards == [['b', 'c', 'new_1'], ['a']]
+
+
+def test_shard_count_rejects_less_than_one_shard():
+    assert shard_count('3') == 3
+    for value in ('0', '-2'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            shard_count(value)
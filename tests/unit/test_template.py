@@ -0,0 +1,48 @@
+import os
+import re
+import subprocess
+import sys
+
+from pytest_html_reporter_netesenz.eventlog import EventLog
+from pytest_html_reporter_netesenz.recovery import ReplayReport
+from pytest_html_reporter_netesenz.template import compact_markup
+
+
+def test_compact_markup_strips_whitespace_between_tags_only():
+    row = """
+            <tr>
+                <td class="metrics-text">__sname__</td>
+                <td>a  b</td>
+            </tr>
+        """
+    assert compact_markup(row) == '<tr><td class="metrics-text">__sname__</td><td>a  b</td></tr>'
+
+
+def render_report(directory, compact):
+    """Write a two test report with --html-report-compact on or off, in a fresh process like a pytest session."""
+    log = EventLog(str(directory / 'events.ndjson'))
+    log.session(100.0, {'compact': compact}, None)
+    for i, outcome in enumerate(('passed', 'failed')):
+        for when in ('setup', 'call', 'teardown'):
+            phase_outcome = outcome if when == 'call' else 'passed'
+            log.report(ReplayReport('test_a.py::test_%d' % i, when, phase_outcome, 0.1,
+                                    'E   assert 0' if phase_outcome == 'failed' else ''), 'test_%d' % i, 100.0, 100.1)
+    log.close()
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    subprocess.run([sys.executable, '-m', 'pytest_html_reporter_netesenz', 'recover', log.path, '--html-report',
+                    str(directory / 'report')], check=True, stdout=subprocess.DEVNULL,
+                   env=dict(os.environ, PYTHONPATH=root))
+    with open(str(directory / 'report' / 'pytest_html_report.html')) as html_file:
+        return html_file.read()
+
+
+def test_compact_report_only_drops_whitespace_between_tags(tmp_path):
+    (tmp_path / 'indented').mkdir()
+    (tmp_path / 'compact').mkdir()
+    indented = render_report(tmp_path / 'indented', False)
+    compact = render_report(tmp_path / 'compact', True)
+
+    assert len(compact) < len(indented)
+    assert '<tr><td' in compact and '<tr><td' not in indented
+    assert re.sub(r'>\s+<', '><', compact) == re.sub(r'>\s+<', '><', indented)
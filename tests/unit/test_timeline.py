@@ -0,0 +1,27 @@
+from pytest_html_reporter_netesenz.timeline import decode_starts, encode_timeline, script_json
+
+
+def test_encode_timeline_delta_encodes_sorted_starts():
+    data = encode_timeline([
+        (10.5, 10.75, 'gw1', 'FAIL', 'test_b.py', 'test_2'),
+        (10.0, 10.25, 'gw0', 'PASS', 'test_a.py', 'test_1'),
+        (10.25, 12.0, 'gw0', 'SKIP', 'test_a.py', 'test_3'),
+    ])
+
+    assert data['origin'] == 10.0
+    assert decode_starts(data['start']) == [0, 250, 500]
+    assert data['duration'] == [250, 1750, 250]
+    assert data['workers'] == ['gw0', 'gw1']
+    assert data['worker'] == [0, 0, 1]
+    assert data['suites'] == ['test_a.py', 'test_b.py']
+    assert [data['statuses'][s] for s in data['status']] == ['PASS', 'SKIP', 'FAIL']
+    assert data['name'] == ['test_1', 'test_3', 'test_2']
+
+
+def test_encode_timeline_empty():
+    data = encode_timeline([])
+    assert data['start'] == [] and data['workers'] == []
+
+
+def test_script_json_cannot_close_the_script_tag():
+    assert '</script>' not in script_json({'name': ['test_x[</script>]']})